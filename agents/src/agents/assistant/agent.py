@@ -8,12 +8,10 @@ from langchain_mcp_adapters.client import MultiServerMCPClient
 import requests
 import os
 
-import asyncio
-from queue import Queue
-from threading import Thread
 from typing import List
 
 from agents.models.question import FR
+from agents.streaming import stream_agent_events
 
 load_dotenv()
 
@@ -192,147 +190,50 @@ class AssistantAgent:
                 # Prepend history to current message
                 input_data["messages"] = history_messages + input_data["messages"]
             
+            print(f"DEBUG: Input data: {input_data}")
+            
+            # One agent run: stream tool calls and messages as they happen and
+            # keep the last model message as the final response
             final_message = None
-            queue = Queue()
-            sentinel = object()
+            async for event in stream_agent_events(self.agent, input_data):
+                if event['type'] == 'tool_call':
+                    yield {
+                        'type': 'tool_call',
+                        'tool_name': event['tool'],
+                        'tool_args': event['args'],
+                        'tool_id': event['id']
+                    }
+                elif event['type'] == 'tool_result':
+                    yield event
+                elif event['type'] == 'message':
+                    # Yield intermediate message content
+                    yield event
+                elif event['type'] == 'model_message':
+                    final_message = event
             
-            def _stream_agent():
-                try:
-                    # Debug: Print what we're sending
-                    print(f"DEBUG: Input data: {input_data}")
-                    
-                    # Use streaming to capture tool calls
-                    for chunk in self.agent.stream(input_data):
-                        print(f"DEBUG: Stream chunk: {chunk}")
-                        
-                        # Handle different chunk types
-                        for key, value in chunk.items():
-                            if key == 'model' and 'messages' in value:
-                                # This is a model response chunk
-                                for message in value['messages']:
-                                    if hasattr(message, 'tool_calls') and message.tool_calls:
-                                        # This is a tool call message
-                                        for tool_call in message.tool_calls:
-                                            queue.put(('tool_call', {
-                                                'tool_name': tool_call['name'],
-                                                'tool_args': tool_call['args'],
-                                                'tool_id': tool_call['id']
-                                            }))
-                                    elif hasattr(message, 'content') and message.content:
-                                        # This is a regular message
-                                        if isinstance(message.content, list):
-                                            # Handle structured content
-                                            for content_item in message.content:
-                                                if isinstance(content_item, dict) and content_item.get('type') == 'text':
-                                                    queue.put(('message', content_item['text']))
-                                        else:
-                                            queue.put(('message', message.content))
-                            
-                            elif key == 'tools' and 'messages' in value:
-                                # This is a tool result chunk
-                                for message in value['messages']:
-                                    if hasattr(message, 'content'):
-                                        queue.put(('tool_result', {
-                                            'tool_id': getattr(message, 'tool_call_id', 'unknown'),
-                                            'result': message.content
-                                        }))
-                    
-                    # Get the final result
-                    result = self.agent.invoke(input_data)
-                    print(f"DEBUG: Final result: {result}")
-                    queue.put(('result', result))
-                    
-                except Exception as e:
-                    print(f"DEBUG: Error: {e}")
-                    queue.put(('error', e))
-                finally:
-                    queue.put(sentinel)
+            # The run ends on the model's answer; a run that stops on a tool
+            # call has no answer to give
+            if final_message is None or final_message['message'].tool_calls:
+                yield {
+                    'type': 'error',
+                    'message': 'No response generated'
+                }
+                return
             
-            thread = Thread(target=_stream_agent, daemon=True)
-            thread.start()
+            response_content = final_message['text']
+            print(f"DEBUG: Final response: {response_content}")
             
-            while True:
-                await asyncio.sleep(0.01)
-                
-                if not queue.empty():
-                    item = queue.get()
-                    
-                    if item is sentinel:
-                        break
-                    
-                    if isinstance(item, tuple) and item[0] == 'error':
-                        yield {
-                            'type': 'error',
-                            'message': f"Error in stream: {str(item[1])}"
-                        }
-                        break
-                    
-                    elif isinstance(item, tuple) and item[0] == 'tool_call':
-                        # Yield tool call information
-                        tool_data = item[1]
-                        yield {
-                            'type': 'tool_call',
-                            'tool_name': tool_data['tool_name'],
-                            'tool_args': tool_data['tool_args'],
-                            'tool_id': tool_data['tool_id']
-                        }
-                    
-                    elif isinstance(item, tuple) and item[0] == 'tool_result':
-                        # Yield tool result information
-                        result_data = item[1]
-                        yield {
-                            'type': 'tool_result',
-                            'tool_id': result_data['tool_id'],
-                            'result': result_data['result']
-                        }
-                    
-                    elif isinstance(item, tuple) and item[0] == 'message':
-                        # Yield intermediate message content
-                        yield {
-                            'type': 'message',
-                            'content': item[1]
-                        }
-                    
-                    elif isinstance(item, tuple) and item[0] == 'result':
-                        result = item[1]
-                        # Extract the final response from the result
-                        if 'output' in result:
-                            # The response is in the 'output' field
-                            response_content = result['output']
-                            
-                            # Save to conversation history
-                            from langchain_core.messages import HumanMessage, AIMessage
-                            history = get_session_history(thread_id)
-                            history.add_message(HumanMessage(content=query))
-                            history.add_message(AIMessage(content=response_content))
-                            
-                            yield {
-                                'type': 'final_response',
-                                'content': response_content
-                            }
-                        elif 'messages' in result and result['messages']:
-                            # Fallback to messages format
-                            final_message = result['messages'][-1]
-                            
-                            # Save to conversation history
-                            from langchain_core.messages import HumanMessage, AIMessage
-                            history = get_session_history(thread_id)
-                            history.add_message(HumanMessage(content=query))
-                            history.add_message(AIMessage(content=final_message.content))
-                            
-                            yield {
-                                'type': 'final_response',
-                                'content': final_message.content
-                            }
-                        else:
-                            yield {
-                                'type': 'error',
-                                'message': 'No response generated'
-                            }
-                        break
+            # Save to conversation history
+            from langchain_core.messages import HumanMessage, AIMessage
+            history = get_session_history(thread_id)
+            history.add_message(HumanMessage(content=query))
+            history.add_message(AIMessage(content=response_content))
+            
+            yield {
+                'type': 'final_response',
+                'content': response_content
+            }
             
-            # This check is now redundant since we handle it above
-
         except Exception as e:
             yield {
                 'type': 'error',
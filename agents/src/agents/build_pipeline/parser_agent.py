@@ -1,4 +1,5 @@
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
 import os
 import re
 from dotenv import load_dotenv
@@ -212,7 +213,8 @@ class ParserAgent:
                 'step': 'partitioning'
             }
             
-            chunks = self.partition_and_chunk(result.url)
+            # Blocking HTTP and parsing work runs off the event loop
+            chunks = await asyncio.to_thread(self.partition_and_chunk, result.url)
             
             if len(chunks) == 0:
                 yield {
@@ -239,7 +241,7 @@ class ParserAgent:
             
             index_name = self.create_elasticsearch_index_name(result.title)
             
-            if self.build_elasticsearch_index(chunks):
+            if await asyncio.to_thread(self.build_elasticsearch_index, chunks):
                 yield {
                     'type': 'progress',
                     'message': f'Elasticsearch index "{index_name}" built successfully',
@@ -270,7 +272,7 @@ class ParserAgent:
                 if there are no questions, return an empty list.
             """
             
-            res = self.query_elastic_agent(prompt, "question_parser")
+            res = await asyncio.to_thread(self.query_elastic_agent, prompt, "question_parser")
             
             if res:
                 yield {
@@ -1,59 +1,20 @@
 from dotenv import load_dotenv
-from langchain.agents import create_agent
-from langchain_core.tools import tool
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_perplexity import ChatPerplexity
-import json
-from langchain_anthropic import ChatAnthropic
-from langchain.agents.structured_output import ToolStrategy
-import asyncio
-from queue import Queue
-from threading import Thread
 
 from agents.models.search import SearchRequest, SearchResults, SearchResult
 
 load_dotenv()
 
 
-@tool
-def search_perplexity_tool(input_text: str) -> str:
-    """
-    Search the web for information using Perplexity.
-    Args:
-        input_text: The query to search for.
-    Returns:
-        A string containing the search results.
-    """
-    try:
-        chat = ChatPerplexity(temperature=1, model="sonar")
-        
-        system = """You are a helpful assistant that can search the web for information. 
-MAKE SURE TO INCLUDE URL LINKS IN YOUR RESPONSE.
-
-Return your answer in machine readable JSON format.
-"""
-        human = "{input}"
-        prompt = ChatPromptTemplate.from_messages([("system", system), ("human", human)])
-        
-        chat_pipeline = prompt | chat
-        
-        # Get response
-        response = chat_pipeline.invoke({"input": input_text})
-        return response.content
-        
-    except Exception as e:
-        return f"Error searching with Perplexity: {str(e)}"
-    
-
 class SearchAgent:
     def __init__(self, temperature=1, model="sonar"):
         """
-        Initialize the SearchAgent with Perplexity and LangChain agent.
+        Initialize the SearchAgent with a Perplexity structured-output pipeline.
         
         Args:
             temperature: Temperature for Perplexity model (default: 1)
             model: Perplexity model name (default: "sonar")
-            agent_model: LangChain agent model (default: "openai:gpt-5-mini")
         """
         self.temperature = temperature
         self.model = model
@@ -102,18 +63,6 @@ class SearchAgent:
         # Use structured output with the chat pipeline
         self.chat_pipeline = self.prompt | self.chat.with_structured_output(SearchResults)
     
-
-        model = ChatAnthropic(
-            model="claude-sonnet-4-5",
-        )
-        self.agent = create_agent(
-            model,
-            tools=[search_perplexity_tool],
-            system_prompt=self.system_prompt,
-            response_format=ToolStrategy(SearchResults)  
-        )
-    
-    
     async def invoke(self, search_request: SearchRequest):
         try:
             query = (
@@ -127,7 +76,7 @@ class SearchAgent:
             )
             
             # Call Perplexity with structured output
-            results = self.chat_pipeline.invoke({"input": query})
+            results = await self.chat_pipeline.ainvoke({"input": query})
 
             yield {
                 "type": "final_response",
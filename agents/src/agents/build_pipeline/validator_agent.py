@@ -10,6 +10,7 @@ import os
 
 from agents.models.question import QuestionList
 from agents.models.search import SearchRequest
+from agents.streaming import stream_agent_events
 
 load_dotenv()
 
@@ -127,25 +128,14 @@ class ValidatorAgent:
             
             questions = None
             
-            for chunk in self.agent.stream(
-                {"messages": [{"role": "user", "content": prompt_text}]},
-                stream_mode="updates",
+            async for event in stream_agent_events(
+                self.agent,
+                {"messages": [{"role": "user", "content": prompt_text}]}
             ):
-                for step, data in chunk.items():
-                    # Yield tool calls
-                    if 'messages' in data and data['messages']:
-                        message = data['messages'][-1]
-                        if hasattr(message, 'tool_calls') and message.tool_calls:
-                            for tool_call in message.tool_calls:
-                                yield {
-                                    'type': 'tool_call',
-                                    'tool': tool_call['name'],
-                                    'args': tool_call['args'],
-                                    'id': tool_call['id']
-                                }
-                    
-                    if 'structured_response' in data:
-                        questions = data['structured_response']
+                if event['type'] == 'tool_call':
+                    yield event
+                elif event['type'] == 'structured_response':
+                    questions = event['data']
             
             if questions:
                 yield {
@@ -1,9 +1,7 @@
 from dotenv import load_dotenv
 
-from agents.build_pipeline.search_agent import SearchAgent
-from agents.build_pipeline.parser_agent import ParserAgent
-from agents.build_pipeline.validator_agent import ValidatorAgent
 from agents.models.search import PipelineData
+from agents.registry import registry
 
 load_dotenv()
 
@@ -12,7 +10,7 @@ async def search_step(data: PipelineData):
     Step 1: Use SearchAgent to find relevant URLs - yields events during processing
     """
     try:
-        search_agent = SearchAgent()
+        search_agent = registry.get("search")
         search_results = None
         
         async for event in search_agent.invoke(data.search_request):
@@ -56,7 +54,7 @@ async def parse_step(data: PipelineData):
             yield {'type': 'complete', 'data': data}
             return
         
-        parser_agent = ParserAgent()
+        parser_agent = registry.get("parser")
         
         parsed_results = None
         async for event in parser_agent.process_urls_parallel_with_progress(data.search_results, max_workers=4):
@@ -107,7 +105,7 @@ async def validate_step(data: PipelineData):
             yield {'type': 'complete', 'data': data}
             return
         
-        validator = ValidatorAgent()
+        validator = registry.get("validator")
         
         yield {
             'type': 'progress',
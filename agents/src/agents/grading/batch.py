@@ -0,0 +1,157 @@
+from dotenv import load_dotenv
+import os
+import asyncio
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from agents.grading.pre_grader import pre_grader
+from agents.models.question import BatchGradeItem, FRGrade
+
+if TYPE_CHECKING:
+    from agents.grading.free_response import FreeResponseGraderAgent
+
+load_dotenv()
+
+# Most LLM calls a batch runs at once
+FR_BATCH_CONCURRENCY = int(os.getenv("FR_BATCH_CONCURRENCY", "4"))
+# Most answers packed into one call, and the most answer text per call; beyond
+# these the model starts to blur answers together, so they get their own calls
+FR_BATCH_PACK_SIZE = int(os.getenv("FR_BATCH_PACK_SIZE", "5"))
+FR_BATCH_PACK_MAX_CHARS = int(os.getenv("FR_BATCH_PACK_MAX_CHARS", "6000"))
+
+def plan_batch(items: List[BatchGradeItem]) -> List[List[int]]:
+    """
+    Group item indices into grading calls. Answers to the same question
+    (text, example answer, rubric and points all equal) are packed together up
+    to the size limits; every other answer is graded on its own.
+    """
+    by_question: Dict[str, List[int]] = {}
+    for index, item in enumerate(items):
+        by_question.setdefault(item.question.model_dump_json(), []).append(index)
+
+    calls = []
+    for indices in by_question.values():
+        pack: List[int] = []
+        pack_chars = 0
+        for index in indices:
+            answer_chars = len(items[index].student_answer)
+            if pack and (len(pack) >= FR_BATCH_PACK_SIZE or pack_chars + answer_chars > FR_BATCH_PACK_MAX_CHARS):
+                calls.append(pack)
+                pack, pack_chars = [], 0
+            pack.append(index)
+            pack_chars += answer_chars
+        calls.append(pack)
+    return calls
+
+async def grade_single(grader: "FreeResponseGraderAgent", item: BatchGradeItem) -> Tuple[FRGrade, str]:
+    """The grade and the model tier that produced it"""
+    async for event in grader.grade_free_response(
+        question=item.question.data,
+        student_answer=item.student_answer,
+        # grade_batch already pre-graded every item
+        pre_grade=False
+    ):
+        if event['type'] == 'final_response':
+            return event['data'], event['tier']
+        if event['type'] == 'error':
+            raise RuntimeError(event['message'])
+    raise RuntimeError("No valid grading response generated")
+
+async def grade_call(
+    grader: "FreeResponseGraderAgent",
+    items: List[BatchGradeItem],
+    indices: List[int],
+    semaphore: asyncio.Semaphore
+):
+    """
+    Grade one planned call. Returns (index, grade or None, error or None,
+    packed, tier) per item. A packed call whose response misses an answer or gives
+    an out-of-range score falls back to grading those answers individually.
+    Every LLM call, fallbacks included, holds a slot of `semaphore`.
+    """
+    async def regrade(index: int):
+        try:
+            async with semaphore:
+                grade, tier = await grade_single(grader, items[index])
+            return (index, grade, None, False, tier)
+        except Exception as e:
+            return (index, None, str(e), False, None)
+
+    if len(indices) == 1:
+        return [await regrade(indices[0])]
+
+    question = items[indices[0]].question.data
+    grades: Dict[int, FRGrade] = {}
+    async with semaphore:
+        async for event in grader.grade_free_response_batch(
+            question=question,
+            student_answers=[items[index].student_answer for index in indices]
+        ):
+            if event['type'] == 'final_response':
+                for grade in event['data'].grades:
+                    if 0 <= grade.answer_index < len(indices) and 0 <= grade.score <= question.points:
+                        grades.setdefault(grade.answer_index, FRGrade(score=grade.score, explanation=grade.explanation))
+            elif event['type'] == 'error':
+                break
+    
+    # Packed calls always use the strong model
+    results = [(index, grades[position], None, True, 'strong') for position, index in enumerate(indices) if position in grades]
+    results += await asyncio.gather(*(
+        regrade(index) for position, index in enumerate(indices) if position not in grades
+    ))
+    return results
+
+async def grade_batch(items: List[BatchGradeItem], grader, max_concurrency: int = FR_BATCH_CONCURRENCY):
+    """
+    Grade many (question, answer) pairs, yielding each item's result as soon
+    as its call completes
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    gradable = []
+    for index, item in enumerate(items):
+        if item.question.data.type != "fr":
+            yield {
+                'type': 'item_error',
+                'index': index,
+                'id': item.id,
+                'message': 'Only free response questions can be graded with this endpoint'
+            }
+            continue
+        
+        pre_graded = pre_grader.grade(item.question.data, item.student_answer)
+        if pre_graded:
+            yield {
+                'type': 'item_graded',
+                'index': index,
+                'id': item.id,
+                'data': pre_graded['grade'],
+                'packed': False,
+                'tier': 'pre_grader',
+                'pre_graded': pre_graded['reason']
+            }
+        else:
+            gradable.append(index)
+
+    calls = [
+        [gradable[position] for position in call]
+        for call in plan_batch([items[index] for index in gradable])
+    ]
+    yield {
+        'type': 'plan',
+        'items': len(gradable),
+        'calls': len(calls),
+        'packed_calls': sum(1 for call in calls if len(call) > 1)
+    }
+
+    tasks = [asyncio.create_task(grade_call(grader, items, indices, semaphore)) for indices in calls]
+    try:
+        for next_call in asyncio.as_completed(tasks):
+            for index, grade, error, packed, tier in await next_call:
+                if grade is None:
+                    yield {'type': 'item_error', 'index': index, 'id': items[index].id, 'message': error}
+                else:
+                    yield {'type': 'item_graded', 'index': index, 'id': items[index].id, 'data': grade, 'packed': packed, 'tier': tier}
+    finally:
+        # Client went away: don't leave LLM calls running
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,189 @@
+from dotenv import load_dotenv
+import os
+import re
+import difflib
+from fractions import Fraction
+from typing import Any, Dict, List, Optional
+
+from agents.models.question import FR, FRGrade
+
+load_dotenv()
+
+# A number, optionally with thousands separators, a decimal part and an
+# exponent written as e-notation or "× 10^n"
+NUMBER_PATTERN = re.compile(
+    r"(?<![\w.^])(?P<sign>[-+−])?(?P<mantissa>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?|\.\d+)"
+    r"(?:\s*(?:[eE](?P<e_exp>[-+]?\d+)|\s*[x×*·]\s*10\s*\^\s*\{?(?P<pow_exp>[-+−]?\d+)\}?))?"
+    r"(?:\s*/\s*(?P<denominator>\d+(?:\.\d+)?)(?![\d.]))?"
+)
+# Words allowed next to the number in a key or answer that is "just a number", e.g. units
+MAX_NUMERIC_EXTRA_WORDS = 3
+# Rubrics that award points for anything but the final value need the model
+RUBRIC_WORK_PATTERN = re.compile(
+    r"\b(?:show|shows|shown|showing|work|steps?|method|explain|explains|explanation|reason|reasoning|"
+    r"justify|justifies|justification|derive|derives|derivation|process|setup|set up|units?|diagram)\b",
+    re.IGNORECASE
+)
+RUBRIC_POINTS_PATTERN = re.compile(r"\d+(?:\.\d+)?\s*(?:points?|pts?|marks?)\b", re.IGNORECASE)
+# A near-copy of the example that adds or drops one of these says the opposite
+NEGATIONS = frozenset((
+    "not", "no", "never", "none", "nor", "cannot", "isnt", "arent", "wasnt", "werent",
+    "dont", "doesnt", "didnt", "cant", "wont", "shouldnt", "wouldnt", "couldnt",
+))
+
+def extract_numbers(text: str) -> List[float]:
+    numbers = []
+    for match in NUMBER_PATTERN.finditer(text):
+        value = float(match.group("mantissa").replace(",", ""))
+        exponent = match.group("e_exp") or match.group("pow_exp")
+        if exponent:
+            value *= 10 ** int(exponent.replace("−", "-"))
+        if match.group("denominator"):
+            denominator = float(match.group("denominator"))
+            if denominator == 0:
+                continue
+            value = float(Fraction(value) / Fraction(denominator))
+        if match.group("sign") in ("-", "−"):
+            value = -value
+        numbers.append(value)
+    return numbers
+
+def normalize_text(text: str) -> str:
+    text = re.sub(r"['’]", "", text.lower())
+    return " ".join(re.sub(r"[^\w\s.]", " ", text).split())
+
+class PreGrader:
+    """
+    Grades the free response answers whose outcome doesn't need a model:
+
+    - answers nearly identical to the example answer, with the same numbers
+      and negations, score full points (unless the example is a bare value
+      and the rubric also gives points for working)
+    - empty or too-short answers score 0
+    - when the example answer is a single number (units allowed), the
+      rubric gives points only for that value, and the answer is just a
+      matching number without negations, it scores full points
+
+    Anything else returns None and goes to the LLM grader. Counts how many
+    answers each rule settled.
+    """
+    def __init__(
+        self,
+        enabled: bool = True,
+        min_chars: int = 3,
+        similarity: float = 0.9,
+        numeric_tolerance: float = 1e-3
+    ):
+        self.enabled = enabled
+        self.min_chars = min_chars
+        self.similarity = similarity
+        self.numeric_tolerance = numeric_tolerance
+        self._stats = {"checked": 0, "empty": 0, "too_short": 0, "matches_example": 0, "numeric_match": 0}
+
+    def grade(self, question: FR, student_answer: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns {'grade': FRGrade, 'reason': str} when the answer can be graded
+        without the LLM, otherwise None
+        """
+        if not self.enabled:
+            return None
+        self._stats["checked"] += 1
+        result = self._grade(question, student_answer)
+        if result is not None:
+            self._stats[result["reason"]] += 1
+        return result
+
+    def _grade(self, question: FR, student_answer: str) -> Optional[Dict[str, Any]]:
+        answer = normalize_text(student_answer)
+        if not any(char.isalnum() for char in answer):
+            return {
+                "reason": "empty",
+                "grade": FRGrade(score=0, explanation="No answer was given.")
+            }
+
+        answer_numbers = extract_numbers(student_answer)
+        key_numbers = extract_numbers(question.answer)
+        example = normalize_text(question.answer)
+        # A bare value can't earn the points a rubric gives for working
+        value_key = self._is_bare_number(question.answer) and len(key_numbers) == 1
+        value_only = value_key and not self._rubric_rewards_work(question.rubric)
+        if (
+            example
+            and (value_only or not value_key)
+            and self._similar(answer, example)
+            and self._same_numbers(answer_numbers, key_numbers)
+            and self._negations(answer) == self._negations(example)
+        ):
+            return {
+                "reason": "matches_example",
+                "grade": FRGrade(score=question.points, explanation="The answer matches the example answer.")
+            }
+
+        if len(answer.replace(" ", "")) < self.min_chars and not answer_numbers:
+            return {
+                "reason": "too_short",
+                "grade": FRGrade(score=0, explanation="The answer is too short to address the question.")
+            }
+
+        if (
+            value_only
+            and len(answer_numbers) == 1
+            and self._is_bare_number(student_answer)
+            and self._negations(answer) == self._negations(example)
+        ):
+            expected = key_numbers[0]
+            actual = answer_numbers[0]
+            if self._close(actual, expected):
+                return {
+                    "reason": "numeric_match",
+                    "grade": FRGrade(score=question.points, explanation=f"The final answer {actual:g} matches the expected value {expected:g}.")
+                }
+
+        return None
+
+    def _similar(self, answer: str, example: str) -> bool:
+        matcher = difflib.SequenceMatcher(None, answer, example)
+        # Cheap upper bounds first; most answers fail these
+        return (
+            matcher.real_quick_ratio() >= self.similarity
+            and matcher.quick_ratio() >= self.similarity
+            and matcher.ratio() >= self.similarity
+        )
+
+    def _close(self, actual: float, expected: float) -> bool:
+        return abs(actual - expected) <= self.numeric_tolerance * max(abs(expected), 1e-12)
+
+    def _same_numbers(self, answer_numbers: List[float], key_numbers: List[float]) -> bool:
+        # A near-copy with one digit changed is still a wrong answer
+        return len(answer_numbers) == len(key_numbers) and all(
+            self._close(actual, expected) for actual, expected in zip(answer_numbers, key_numbers)
+        )
+
+    def _negations(self, text: str) -> int:
+        return sum(1 for word in text.split() if word in NEGATIONS)
+
+    def _is_bare_number(self, text: str) -> bool:
+        # A value with at most a few words around it, e.g. units
+        words = NUMBER_PATTERN.sub(" ", text)
+        words = re.sub(r"[^\w\s]", " ", words).split()
+        return len(words) <= MAX_NUMERIC_EXTRA_WORDS
+
+    def _rubric_rewards_work(self, rubric: str) -> bool:
+        # Working, explanation or several separately scored parts
+        return bool(RUBRIC_WORK_PATTERN.search(rubric)) or len(RUBRIC_POINTS_PATTERN.findall(rubric)) > 1
+
+    def stats(self) -> Dict[str, Any]:
+        handled = sum(count for reason, count in self._stats.items() if reason != "checked")
+        return {
+            "enabled": self.enabled,
+            **self._stats,
+            "handled": handled,
+            "handled_fraction": handled / self._stats["checked"] if self._stats["checked"] else 0.0,
+        }
+
+pre_grader = PreGrader(
+    enabled=os.getenv("FR_PREGRADE", "true").lower() in ("1", "true", "yes"),
+    min_chars=int(os.getenv("FR_PREGRADE_MIN_CHARS", "3")),
+    similarity=float(os.getenv("FR_PREGRADE_SIMILARITY", "0.9")),
+    numeric_tolerance=float(os.getenv("FR_PREGRADE_NUMERIC_TOLERANCE", "0.001"))
+)
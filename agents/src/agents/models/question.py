@@ -60,10 +60,32 @@ class FRGrade(BaseModel):
     score: int
     explanation: str
 
+class FRTriageGrade(BaseModel):
+    score: int
+    explanation: str
+    confidence: float = Field(description="How sure the grader is that the score is right, from 0 to 1")
+
+class FRAnswerGrade(BaseModel):
+    answer_index: int = Field(description="Index of the student answer this grade is for")
+    score: int
+    explanation: str
+
+class FRBatchGrade(BaseModel):
+    grades: List[FRAnswerGrade]
+
 class GradeRequest(BaseModel):
     question: Question
     student_answer: str
 
+class BatchGradeItem(BaseModel):
+    id: Optional[str] = Field(default=None, description="Caller's id for this answer, echoed back in its result")
+    question: Question
+    student_answer: str
+
+class BatchGradeRequest(BaseModel):
+    items: List[BatchGradeItem]
+    max_concurrency: Optional[int] = Field(default=None, description="Lower the server's limit on concurrent LLM calls")
+
 class GradeResponse(BaseModel):
     status: str
     step: str
@@ -0,0 +1,117 @@
+from dotenv import load_dotenv
+import os
+import time
+import itertools
+import logging
+from typing import Any, Callable, Dict, List
+
+from agents.assistant.agent import AssistantAgent
+from agents.build_pipeline.parser_agent import ParserAgent
+from agents.build_pipeline.search_agent import SearchAgent
+from agents.build_pipeline.validator_agent import ValidatorAgent
+from agents.grading.free_response import FreeResponseGraderAgent
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# How long a failed agent stays failed before a request tries to build it again
+AGENT_REBUILD_BACKOFF_SECONDS = float(os.getenv("AGENT_REBUILD_BACKOFF_SECONDS", "60"))
+
+AGENT_FACTORIES: Dict[str, Callable[[], Any]] = {
+    "search": SearchAgent,
+    "parser": ParserAgent,
+    "validator": ValidatorAgent,
+    "grader": FreeResponseGraderAgent,
+    "assistant": AssistantAgent,
+}
+
+class AgentUnavailableError(Exception):
+    """An agent could not be built; requests that need it get a 503"""
+    def __init__(self, name: str, error: str):
+        super().__init__(f"{name} agent is unavailable: {error}")
+        self.name = name
+        self.error = error
+
+class AgentRegistry:
+    """
+    Agents built once at startup and shared by every request. The agents keep
+    no per-request state (each run gets its own input and chat history is kept
+    per thread), so concurrent requests can use the same instance; a pool of
+    several instances spreads requests over separate model clients and their
+    connection pools, handed out round-robin.
+
+    An agent that fails to build is recorded as unavailable; requests for it
+    raise AgentUnavailableError until `rebuild_backoff` seconds have passed,
+    then the next request tries to build it again.
+    """
+    def __init__(self, pool_sizes: Dict[str, int], rebuild_backoff: float = 60.0):
+        self.pool_sizes = {name: max(1, size) for name, size in pool_sizes.items()}
+        self.rebuild_backoff = rebuild_backoff
+        self._pools: Dict[str, List[Any]] = {}
+        self._cycles: Dict[str, Any] = {}
+        self._build_seconds: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self._failed_at: Dict[str, float] = {}
+
+    def _build(self, name: str) -> bool:
+        started_at = time.perf_counter()
+        try:
+            pool = [AGENT_FACTORIES[name]() for _ in range(self.pool_sizes.get(name, 1))]
+        except Exception as e:
+            # Recorded so one misconfigured agent doesn't take the others down
+            # or get rebuilt by every request
+            self._errors[name] = str(e)
+            self._failed_at[name] = time.monotonic()
+            logger.exception("Could not build %s agent", name)
+            return False
+
+        self._build_seconds[name] = time.perf_counter() - started_at
+        self._pools[name] = pool
+        self._cycles[name] = itertools.cycle(pool)
+        self._errors.pop(name, None)
+        self._failed_at.pop(name, None)
+        return True
+
+    async def start(self) -> None:
+        started_at = time.perf_counter()
+        for name in AGENT_FACTORIES:
+            if not self._build(name):
+                continue
+
+            if name == "assistant":
+                for assistant in self._pools[name]:
+                    await assistant._load_mcp_tools()
+
+        built = ", ".join(
+            f"{name} x{len(self._pools[name])} {self._build_seconds[name] * 1000:.0f} ms"
+            for name in self._pools
+        )
+        logger.info("Built agents in %.0f ms: %s", (time.perf_counter() - started_at) * 1000, built)
+
+    def get(self, name: str) -> Any:
+        if name not in self._pools:
+            failed_at = self._failed_at.get(name)
+            if failed_at is not None and time.monotonic() - failed_at < self.rebuild_backoff:
+                raise AgentUnavailableError(name, self._errors[name])
+            if not self._build(name):
+                raise AgentUnavailableError(name, self._errors[name])
+        return next(self._cycles[name])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "pool_size": len(self._pools.get(name, [])),
+                "build_ms": round(self._build_seconds[name] * 1000, 1) if name in self._build_seconds else None,
+                "error": self._errors.get(name),
+            }
+            for name in AGENT_FACTORIES
+        }
+
+registry = AgentRegistry(
+    {
+        name: int(os.getenv(f"AGENT_POOL_{name.upper()}", os.getenv("AGENT_POOL_SIZE", "1")))
+        for name in AGENT_FACTORIES
+    },
+    rebuild_backoff=AGENT_REBUILD_BACKOFF_SECONDS
+)
@@ -3,15 +3,13 @@ from fastapi import APIRouter
 from fastapi.responses import StreamingResponse
 import json
 
-from agents.assistant.agent import AssistantAgent
 from agents.models.assistant import AssistantRequest
+from agents.registry import registry
 
 router = APIRouter(prefix="/agents", tags=["agents"])
 
-async def stream_assistant_execution(request: AssistantRequest):
+async def stream_assistant_execution(request: AssistantRequest, assistant):
     try:
-        assistant = AssistantAgent()
-        
         yield f"data: {json.dumps({'status': 'started', 'step': 'assistant', 'message': 'Assistant agent: Starting to process your query...'})}\n\n"
         
         try:
@@ -37,9 +35,11 @@ async def stream_assistant_execution(request: AssistantRequest):
 
 @router.post("/assistant")
 async def get_assistant_response(request: AssistantRequest):
+    # Unavailable agents answer 503 before the stream starts
+    assistant = registry.get("assistant")
     try:
         return StreamingResponse(
-            stream_assistant_execution(request),
+            stream_assistant_execution(request, assistant),
             media_type="text/event-stream",
             headers={
                 "Cache-Control": "no-cache",
@@ -1,20 +1,21 @@
 from fastapi import HTTPException
-from fastapi import APIRouter
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 import json
 
-from agents.grading.free_response import FreeResponseGraderAgent
-from agents.models.question import GradeRequest, GradeResponse
+from agents.grading.batch import FR_BATCH_CONCURRENCY, grade_batch
+from agents.grading.free_response import cascade_stats
+from agents.grading.pre_grader import pre_grader
+from agents.models.question import BatchGradeRequest, GradeRequest, GradeResponse
+from agents.registry import registry
 
 router = APIRouter(prefix="/agents", tags=["agents"])
 
-async def stream_grade_execution(request: GradeRequest):
+async def stream_grade_execution(request: GradeRequest, grader):
     """
     Stream the grading execution with real-time updates
     """
     try:
-        grader = FreeResponseGraderAgent()
-        
         yield f"data: {json.dumps({'status': 'started', 'step': 'grade', 'message': 'Free response grader: Starting to grade student answer...'})}\n\n"
         
         try:
@@ -28,16 +29,20 @@ async def stream_grade_execution(request: GradeRequest):
                 student_answer=request.student_answer
             ):
                 if event['type'] == 'tool_call':
-                    yield f"data: {json.dumps({'status': 'tool_call', 'step': 'grade', 'tool': event['tool'], 'args': event['args'], 'tool_id': event['id']})}\n\n"
+                    yield f"data: {json.dumps({'status': 'tool_call', 'step': 'grade', 'tool': event['tool'], 'args': event['args'], 'tool_id': event['id'], 'tier': event.get('tier')})}\n\n"
+                elif event['type'] == 'escalated':
+                    message = f"Fast grader was unsure ({event['reason']}), re-grading with the strong model"
+                    yield f"data: {json.dumps({'status': 'escalated', 'step': 'grade', 'message': message, 'data': {'reason': event['reason'], 'confidence': event['confidence']}})}\n\n"
                 elif event['type'] == 'final_response':
                     grade_result = event['data']
-                    yield f"data: {json.dumps({'status': 'completed', 'step': 'grade', 'message': 'Grading completed successfully', 'data': {'score': grade_result.score, 'max_points': request.question.data.points, 'explanation': grade_result.explanation}})}\n\n"
+                    yield f"data: {json.dumps({'status': 'completed', 'step': 'grade', 'message': 'Grading completed successfully', 'data': {'score': grade_result.score, 'max_points': request.question.data.points, 'explanation': grade_result.explanation, 'tier': event.get('tier'), 'confidence': event.get('confidence'), 'pre_graded': event.get('pre_graded')}})}\n\n"
                     
                     grade_data = {
                         'score': grade_result.score,
                         'max_points': request.question.data.points,
                         'explanation': grade_result.explanation,
-                        'question_id': request.question.id,
+                        'tier': event.get('tier'),
+                        'pre_graded': event.get('pre_graded'),
                         'question_text': request.question.text,
                         'student_answer': request.student_answer
                     }
@@ -53,24 +58,112 @@ async def stream_grade_execution(request: GradeRequest):
     except Exception as e:
         yield f"data: {json.dumps({'status': 'error', 'step': 'pipeline', 'message': 'Grading pipeline failed', 'error': str(e)})}\n\n"
 
+def wants_json(http_request: Request) -> bool:
+    accept = http_request.headers.get("accept", "")
+    return "application/json" in accept and "text/event-stream" not in accept
+
+async def grade_free_response_json(request: GradeRequest) -> JSONResponse:
+    """
+    Grade without streaming and return the final FRGrade
+    """
+    if request.question.data.type != "fr":
+        raise HTTPException(status_code=400, detail="Only free response questions can be graded with this endpoint")
+    
+    grader = registry.get("grader")
+    async for event in grader.grade_free_response(
+        question=request.question.data,
+        student_answer=request.student_answer
+    ):
+        if event['type'] == 'final_response':
+            return JSONResponse(event['data'].model_dump())
+        elif event['type'] == 'error':
+            raise HTTPException(status_code=502, detail=f"Grading failed: {event['message']}")
+    raise HTTPException(status_code=502, detail="No valid grading response generated")
+
 @router.post("/grade")
-async def grade_free_response(request: GradeRequest):
+async def grade_free_response(request: GradeRequest, http_request: Request):
+    """
+    Grade a free response question using the free response grader agent.
+    Streams progress as SSE, or returns just the FRGrade as JSON when the
+    client sends Accept: application/json
+    """
+    if wants_json(http_request):
+        return await grade_free_response_json(request)
+    
+    # Unavailable agents answer 503 before the stream starts
+    grader = registry.get("grader")
+    return StreamingResponse(
+        stream_grade_execution(request, grader),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Headers": "*",
+        }
+    )
+
+async def stream_batch_grade_execution(request: BatchGradeRequest, grader):
     """
-    Grade a free response question using the free response grader agent
+    Stream each answer's grade as soon as it is ready
     """
     try:
-        # Create streaming response
-        return StreamingResponse(
-            stream_grade_execution(request),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "*",
-            }
-        )
+        total = len(request.items)
+        concurrency = min(request.max_concurrency or FR_BATCH_CONCURRENCY, FR_BATCH_CONCURRENCY)
+        yield f"data: {json.dumps({'status': 'started', 'step': 'grade', 'message': f'Free response grader: Starting to grade {total} answers...'})}\n\n"
+        
+        graded = 0
+        failed = 0
+        async for event in grade_batch(request.items, grader, concurrency):
+            if event['type'] == 'plan':
+                message = f"Grading {event['items']} answers in {event['calls']} calls"
+                yield f"data: {json.dumps({'status': 'progress', 'step': 'grade', 'message': message, 'data': event})}\n\n"
+            elif event['type'] == 'item_graded':
+                graded += 1
+                item = request.items[event['index']]
+                grade_data = {
+                    'index': event['index'],
+                    'id': event['id'],
+                    'score': event['data'].score,
+                    'max_points': item.question.data.points,
+                    'explanation': event['data'].explanation,
+                    'packed': event['packed'],
+                    'tier': event['tier'],
+                    'pre_graded': event.get('pre_graded')
+                }
+                yield f"data: {json.dumps({'status': 'item_graded', 'step': 'grade', 'message': f'Graded {graded + failed}/{total} answers', 'data': grade_data})}\n\n"
+            elif event['type'] == 'item_error':
+                failed += 1
+                message = f"Grading failed for answer {event['index']}"
+                yield f"data: {json.dumps({'status': 'item_error', 'step': 'grade', 'message': message, 'data': {'index': event['index'], 'id': event['id']}, 'error': event['message']})}\n\n"
+        
+        yield f"data: {json.dumps({'status': 'completed', 'step': 'pipeline', 'message': f'Graded {graded}/{total} answers', 'data': {'graded': graded, 'failed': failed}})}\n\n"
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to start grading: {str(e)}")
+        yield f"data: {json.dumps({'status': 'error', 'step': 'pipeline', 'message': 'Batch grading failed', 'error': str(e)})}\n\n"
 
+@router.post("/grade/batch")
+async def grade_free_response_batch(request: BatchGradeRequest):
+    """
+    Grade many free response answers, packing answers to the same question
+    into shared LLM calls, and stream each result as it completes
+    """
+    # Unavailable agents answer 503 before the stream starts
+    grader = registry.get("grader")
+    return StreamingResponse(
+        stream_batch_grade_execution(request, grader),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Headers": "*",
+        }
+    )
 
+@router.get("/grade/stats")
+async def grade_stats():
+    """
+    How many free response answers were graded without the LLM, and by
+    which model tier the rest were graded
+    """
+    return {"pre_grader": pre_grader.stats(), "cascade": dict(cascade_stats)}
@@ -3,14 +3,23 @@ from typing import List, Optional, Dict, Any, Literal
 from pydantic import BaseModel, Field, field_validator, model_validator
 from datetime import datetime
 from urllib.parse import urlparse
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from agents.router.search import router as search_router
 from agents.router.grade import router as grade_router
 from agents.router.assistant import router as assistant_router
+from agents.registry import AgentUnavailableError, registry
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build every agent once; requests share them
+    await registry.start()
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,6 +29,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(AgentUnavailableError)
+async def agent_unavailable_handler(request: Request, exc: AgentUnavailableError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
 app.include_router(search_router)
 app.include_router(grade_router)
 app.include_router(assistant_router)
@@ -28,3 +41,7 @@ app.include_router(assistant_router)
 @app.get("/health")
 def health():
     return {"ok": True}
+
+@app.get("/registry")
+def registry_stats():
+    return registry.stats()
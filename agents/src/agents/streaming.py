@@ -0,0 +1,56 @@
+def _message_text(content) -> list[str]:
+    """Text parts of a message's content, which is a string or a list of blocks"""
+    if isinstance(content, list):
+        return [
+            item['text'] for item in content
+            if isinstance(item, dict) and item.get('type') == 'text' and item.get('text')
+        ]
+    return [content] if content else []
+
+async def stream_agent_events(agent, input_data: dict):
+    """
+    Run a langchain agent with native async streaming and yield its progress
+    as soon as each step finishes:
+
+    - {'type': 'tool_call', 'tool', 'args', 'id'} when the model calls a tool
+    - {'type': 'tool_result', 'tool_id', 'result'} when a tool returns
+    - {'type': 'message', 'content'} for text the model writes
+    - {'type': 'structured_response', 'data'} for the response_format result
+    - {'type': 'model_message', 'message', 'text'} for every model message,
+      so callers can build the final response from this one run
+
+    Errors propagate to the caller.
+    """
+    async for chunk in agent.astream(input_data, stream_mode="updates"):
+        for step, data in chunk.items():
+            if not isinstance(data, dict):
+                continue
+
+            for message in data.get('messages') or []:
+                if getattr(message, 'type', None) == 'ai':
+                    yield {
+                        'type': 'model_message',
+                        'message': message,
+                        'text': "".join(_message_text(message.content))
+                    }
+
+                if getattr(message, 'type', None) == 'tool':
+                    yield {
+                        'type': 'tool_result',
+                        'tool_id': getattr(message, 'tool_call_id', 'unknown'),
+                        'result': message.content
+                    }
+                elif getattr(message, 'tool_calls', None):
+                    for tool_call in message.tool_calls:
+                        yield {
+                            'type': 'tool_call',
+                            'tool': tool_call['name'],
+                            'args': tool_call['args'],
+                            'id': tool_call['id']
+                        }
+                else:
+                    for text in _message_text(getattr(message, 'content', None)):
+                        yield {'type': 'message', 'content': text}
+
+            if 'structured_response' in data:
+                yield {'type': 'structured_response', 'data': data['structured_response']}
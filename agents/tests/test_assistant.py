@@ -0,0 +1,90 @@
+import asyncio
+
+from langchain.agents import create_agent
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from agents.assistant.agent import AssistantAgent, user_sessions
+
+
+class CountingFakeChatModel(GenericFakeChatModel):
+    """Replays scripted messages and counts every call to the model"""
+    calls: int = 0
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, *args, **kwargs):
+        self.calls += 1
+        return super()._generate(*args, **kwargs)
+
+
+@tool
+def derivative_tool(query: str) -> str:
+    """Differentiate an expression"""
+    return "2 x"
+
+
+def make_assistant(model: CountingFakeChatModel, tools=()) -> AssistantAgent:
+    # Skip __init__, which builds real model clients
+    assistant = AssistantAgent.__new__(AssistantAgent)
+    assistant.mcp_client = None
+    assistant.mcp_tools_loaded = True
+    assistant.agent = create_agent(model, tools=list(tools))
+    return assistant
+
+
+def run_turn(assistant: AssistantAgent, query: str, thread_id: str):
+    async def collect():
+        return [event async for event in assistant.generate_response(query, thread_id)]
+    return asyncio.run(collect())
+
+
+def test_one_model_call_per_turn():
+    model = CountingFakeChatModel(messages=iter([
+        AIMessage(content="The derivative of x^2 is 2x."),
+        AIMessage(content="The derivative of x^3 is 3x^2."),
+    ]))
+    assistant = make_assistant(model)
+    thread_id = "test_one_model_call_per_turn"
+
+    try:
+        events = run_turn(assistant, "What is the derivative of x^2?", thread_id)
+        assert model.calls == 1
+        assert events[-1] == {'type': 'final_response', 'content': "The derivative of x^2 is 2x."}
+
+        events = run_turn(assistant, "And of x^3?", thread_id)
+        assert model.calls == 2
+        assert events[-1] == {'type': 'final_response', 'content': "The derivative of x^3 is 3x^2."}
+
+        history = user_sessions[thread_id].get_messages()
+        assert [message.content for message in history] == [
+            "What is the derivative of x^2?",
+            "The derivative of x^2 is 2x.",
+            "And of x^3?",
+            "The derivative of x^3 is 3x^2.",
+        ]
+    finally:
+        user_sessions.pop(thread_id, None)
+
+
+def test_tool_turn_calls_model_once_per_step():
+    model = CountingFakeChatModel(messages=iter([
+        AIMessage(content="", tool_calls=[
+            {"name": "derivative_tool", "args": {"query": "d/dx x^2"}, "id": "call_1"}
+        ]),
+        AIMessage(content="The derivative of x^2 is 2x."),
+    ]))
+    assistant = make_assistant(model, tools=[derivative_tool])
+    thread_id = "test_tool_turn_calls_model_once_per_step"
+
+    try:
+        events = run_turn(assistant, "What is the derivative of x^2?", thread_id)
+    finally:
+        user_sessions.pop(thread_id, None)
+
+    # One call that asks for the tool and one that answers, nothing re-run
+    assert model.calls == 2
+    assert [event['type'] for event in events] == ['tool_call', 'tool_result', 'message', 'final_response']
+    assert events[-1]['content'] == "The derivative of x^2 is 2x."
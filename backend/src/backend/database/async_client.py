@@ -0,0 +1,64 @@
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+from ..metrics import LatencyHistogram
+from .storage import db_client
+
+class AsyncDBClient:
+    """
+    Async facade over a blocking storage client. Every method of the wrapped
+    client is exposed as a coroutine that runs in a bounded thread pool, so
+    storage round trips never stall the event loop (and the SSE streams on it).
+    Execution time and pool queue wait are recorded per method.
+    """
+    def __init__(self, client: Any, max_workers: int = 8):
+        self._client = client
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage")
+        self._latency: Dict[str, LatencyHistogram] = {}
+        self._queue_wait = LatencyHistogram()
+        self._methods: Dict[str, Callable] = {}
+
+    def _histogram(self, name: str) -> LatencyHistogram:
+        histogram = self._latency.get(name)
+        if histogram is None:
+            histogram = self._latency.setdefault(name, LatencyHistogram())
+        return histogram
+
+    def _run(self, name: str, method: Callable, submitted_at: float, args, kwargs) -> Any:
+        started_at = time.perf_counter()
+        self._queue_wait.record(started_at - submitted_at)
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self._histogram(name).record(time.perf_counter() - started_at)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        wrapper = self._methods.get(name)
+        if wrapper is None:
+            @functools.wraps(attr)
+            async def wrapper(*args, **kwargs):
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    self._executor,
+                    self._run, name, attr, time.perf_counter(), args, kwargs
+                )
+            self._methods[name] = wrapper
+        return wrapper
+
+    def latency_stats(self) -> Dict[str, Any]:
+        return {
+            "queue_wait": self._queue_wait.snapshot(),
+            "methods": {name: histogram.snapshot() for name, histogram in sorted(self._latency.items())},
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+async_db_client = AsyncDBClient(db_client, max_workers=int(os.getenv("DB_MAX_WORKERS", "8")))
@@ -0,0 +1,237 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from ..models.session import Session
+from ..models.question import Question
+from ..models.user import User
+from ..models.assistant import AssistantConversation, AssistantMessage
+
+# Mutable per-attempt fields of a question, stored apart from its content so
+# autosave and grading writes don't rewrite the whole question document.
+# graded_answer_hash and grader_version record which answer, graded by which
+# grader, produced the stored grade, so unchanged answers aren't re-graded
+QUESTION_STATE_FIELDS = (
+    "student_answer", "is_completed", "points_earned",
+    "is_correct", "graded_answer_hash", "grader_version",
+)
+QUESTION_STATE_DEFAULTS = {
+    "student_answer": None, "is_completed": False, "points_earned": None,
+    "is_correct": None, "graded_answer_hash": None, "grader_version": None,
+}
+
+class Storage(ABC):
+    """
+    Storage interface shared by the backends. Documents are returned as plain
+    dicts and may be shared with a cache, so callers must not mutate them.
+
+    Services that derive data from question content (answer keys, cached
+    grades) register a listener with `add_question_listener`; it is called
+    with the question id whenever that content is rewritten.
+    """
+    def __init__(self):
+        self._question_listeners: List[Callable[[str], None]] = []
+
+    def add_question_listener(self, listener: Callable[[str], None]) -> None:
+        if listener not in self._question_listeners:
+            self._question_listeners.append(listener)
+
+    def remove_question_listener(self, listener: Callable[[str], None]) -> None:
+        if listener in self._question_listeners:
+            self._question_listeners.remove(listener)
+
+    # Users
+
+    @abstractmethod
+    def add_user(self, user: User) -> None: ...
+
+    @abstractmethod
+    def get_user(self, user_id: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def update_user_sessions(self, user_id: str, session_id: str) -> None: ...
+
+    def get_user_sessions(self, user_id: str) -> List[str]:
+        user_data = self.get_user(user_id)
+        if user_data:
+            return user_data.get("session_ids", [])
+        return []
+
+    # Sessions
+
+    @abstractmethod
+    def add_session(self, session: Session) -> None: ...
+
+    @abstractmethod
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def update_session_status(self, session_id: str, status: str, score: Optional[float] = None) -> None: ...
+
+    # Questions
+
+    def add_question(self, question: Question, session_id: Optional[str] = None) -> None:
+        self.add_questions_batch([question], session_id=session_id)
+
+    @abstractmethod
+    def add_questions_batch(self, questions: List[Question], session_id: Optional[str] = None) -> None: ...
+
+    @abstractmethod
+    def get_question(self, question_id: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def get_question_state(self, question_id: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def get_questions_by_session(
+        self,
+        session_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def query_questions(
+        self,
+        subject: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        topic: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def update_question_state(self, question_id: str, **fields) -> None:
+        """
+        Blind partial write of per-attempt state (student_answer, is_completed,
+        points_earned). Only the given fields are touched; the question content
+        is never read or rewritten.
+        """
+
+    def update_question_completion(self, question_id: str, is_completed: bool, points_earned: float) -> None:
+        self.update_question_state(question_id, is_completed=is_completed, points_earned=points_earned)
+
+    def update_questions_state(self, states: Dict[str, Dict[str, Any]]) -> None:
+        """Partial state writes for many questions at once, keyed by question id"""
+        for question_id, fields in states.items():
+            self.update_question_state(question_id, **fields)
+
+    def update_questions_completion(self, completions: List[Tuple[str, bool, float]]) -> None:
+        """Write (question_id, is_completed, points_earned) for many questions at once"""
+        self.update_questions_state({
+            question_id: {"is_completed": is_completed, "points_earned": points_earned}
+            for question_id, is_completed, points_earned in completions
+        })
+
+    def save_session_grades(
+        self,
+        session_id: str,
+        states: Dict[str, Dict[str, Any]],
+        status: str,
+        score: Optional[float] = None
+    ) -> None:
+        """
+        Flush a graded session: the state of every re-graded question plus the
+        session status. The status is written last, so a completed session
+        always has its grades.
+        """
+        self.update_questions_state(states)
+        self.update_session_status(session_id, status, score)
+
+    def question_exists(self, question_id: str) -> bool:
+        return self.get_question(question_id) is not None
+
+    def update_question_answer(self, question_id: str, student_answer) -> bool:
+        """
+        Save the student's answer; returns False, writing nothing, for an unknown
+        question. State writes are blind upserts, so without the existence check
+        an unknown id would get an orphan state record. Backends that can make
+        the write itself conditional override this and skip the read.
+        """
+        if not self.question_exists(question_id):
+            return False
+        self.update_question_state(question_id, student_answer=student_answer)
+        return True
+
+    def update_question(self, question_id: str, question_data: dict) -> None:
+        """Rewrite a question's content and state"""
+        self._write_question(question_id, question_data)
+        for listener in list(self._question_listeners):
+            listener(question_id)
+
+    @abstractmethod
+    def _write_question(self, question_id: str, question_data: dict) -> None: ...
+
+    # Assistant conversations
+
+    @abstractmethod
+    def add_assistant_conversation(self, conversation: AssistantConversation) -> None: ...
+
+    @abstractmethod
+    def get_assistant_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the conversation header. Messages are stored in an append-only
+        log and read with get_assistant_messages.
+        """
+
+    @abstractmethod
+    def append_assistant_messages(
+        self,
+        conversation_id: str,
+        messages: List[AssistantMessage],
+        updated_at: datetime
+    ) -> int:
+        """
+        Append messages to a conversation's log and bump its header. Only the new
+        messages are serialized, so a turn costs the same regardless of history length.
+        Returns the new message count.
+        """
+
+    @abstractmethod
+    def get_assistant_messages(
+        self,
+        conversation_id: str,
+        limit: Optional[int] = None,
+        before: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Page backwards through a conversation: returns up to `limit` messages with
+        seq < `before` (default: the end of the log), oldest first. Each message
+        carries its `seq`, which is the cursor for the next page and is always
+        kept by the `fields` projection.
+        """
+
+    @abstractmethod
+    def get_assistant_conversations_by_user(
+        self,
+        user_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def get_assistant_conversations_by_question(
+        self,
+        question_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def get_assistant_conversations_by_session(
+        self,
+        session_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]: ...
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return {}
@@ -0,0 +1,91 @@
+import argparse
+import random
+import shutil
+import tempfile
+import time
+from typing import Dict, List
+from .base import Storage
+from .chromadb_client import ChromaDBClient
+from .sqlite_client import SQLiteClient
+from ..models.question import AgentGeneratedQuestion, MCQ, Question
+
+QUESTIONS_PER_SESSION = 20
+WRITE_BATCH_SIZE = 1000
+SAMPLES = 500
+
+def make_question(index: int) -> Question:
+    return Question(
+        id=f"q{index:08d}",
+        question=AgentGeneratedQuestion(
+            data=MCQ(type="mcq", choices=["A", "B", "C", "D"], answer="A"),
+            text=f"Benchmark question {index}",
+            subject="math",
+            topic=f"topic-{index % 50}",
+            source_url=None,
+            difficulty=("easy", "medium", "hard")[index % 3],
+            image_url=None,
+        ),
+    )
+
+def create_backend(name: str, directory: str) -> Storage:
+    if name == "chroma":
+        # No cache, so lookups measure the store itself
+        return ChromaDBClient(persist_directory=directory, cache_size=0)
+    if name == "sqlite":
+        return SQLiteClient(f"{directory}/platypus.db")
+    raise ValueError(f"Unknown backend: {name}")
+
+def timed(fn, iterations: int) -> float:
+    """Mean milliseconds per call"""
+    started_at = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    return (time.perf_counter() - started_at) * 1000 / iterations
+
+def run(name: str, size: int) -> Dict[str, float]:
+    directory = tempfile.mkdtemp(prefix=f"bench-{name}-")
+    try:
+        client = create_backend(name, directory)
+
+        started_at = time.perf_counter()
+        for start in range(0, size, WRITE_BATCH_SIZE):
+            batch = [make_question(i) for i in range(start, min(start + WRITE_BATCH_SIZE, size))]
+            # Group each batch into sessions the way session creation does
+            for offset in range(0, len(batch), QUESTIONS_PER_SESSION):
+                session_id = f"s{(start + offset) // QUESTIONS_PER_SESSION:08d}"
+                client.add_questions_batch(batch[offset:offset + QUESTIONS_PER_SESSION], session_id=session_id)
+        write_seconds = time.perf_counter() - started_at
+
+        rng = random.Random(0)
+        question_ids = [f"q{rng.randrange(size):08d}" for _ in range(SAMPLES)]
+        session_ids = [f"s{rng.randrange(size // QUESTIONS_PER_SESSION):08d}" for _ in range(SAMPLES)]
+
+        return {
+            "writes_per_s": size / write_seconds,
+            "get_question_ms": timed(lambda i: client.get_question(question_ids[i]), SAMPLES),
+            "get_questions_by_session_ms": timed(lambda i: client.get_questions_by_session(session_ids[i]), SAMPLES),
+            "update_question_answer_ms": timed(lambda i: client.update_question_answer(question_ids[i], "B"), SAMPLES),
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare storage backends on the question workload")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma separated question counts")
+    parser.add_argument("--backends", default="chroma,sqlite", help="Comma separated backends to run")
+    args = parser.parse_args()
+
+    sizes: List[int] = [int(size) for size in args.sizes.split(",")]
+    backends = [backend.strip() for backend in args.backends.split(",")]
+
+    print(f"{'backend':<8} {'questions':>10} {'writes/s':>10} {'get ms':>8} {'session ms':>11} {'answer ms':>10}")
+    for size in sizes:
+        for backend in backends:
+            result = run(backend, size)
+            print(
+                f"{backend:<8} {size:>10} {result['writes_per_s']:>10.0f} {result['get_question_ms']:>8.3f} "
+                f"{result['get_questions_by_session_ms']:>11.3f} {result['update_question_answer_ms']:>10.3f}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,55 @@
 import chromadb
 from chromadb.config import Settings
 import json
-from typing import List, Optional, Dict, Any
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import List, Literal, Optional, Dict, Any, Tuple
+from .base import QUESTION_STATE_DEFAULTS, QUESTION_STATE_FIELDS, Storage
+from .cache import LRUCache
+from .projection import needs_any, project
 from ..models.session import Session
 from ..models.question import Question
 from ..models.user import User
-from ..models.assistant import AssistantConversation
+from ..models.assistant import AssistantConversation, AssistantMessage
+
+logger = logging.getLogger(__name__)
+
+StorageMode = Literal["records", "embedded"]
+
+# Placeholder vector written alongside every record in "records" mode. Passing
+# explicit embeddings keeps Chroma from running the embedding model over the
+# JSON documents, which are only ever looked up by id or metadata.
+RECORD_EMBEDDING = [0.0]
+
+COLLECTIONS = {
+    "users": "Store user data",
+    "sessions": "Store session data",
+    "questions": "Store question data",
+    "assistant_history": "Store assistant conversation history",
+    "question_state": "Store per-attempt student state for questions",
+    "assistant_messages": "Store assistant conversation messages as an append-only log",
+}
+
+class ChromaDBClient(Storage):
+    def __init__(
+        self,
+        persist_directory: str = "./chroma_db",
+        cache_size: int = 1024,
+        cache_ttl: Optional[float] = 300.0,
+        storage_mode: StorageMode = "records",
+        migrate_legacy: bool = True
+    ):
+        if storage_mode not in ("records", "embedded"):
+            raise ValueError(f"Unknown storage mode: {storage_mode}")
+        super().__init__()
+        self.storage_mode = storage_mode
+
+        # Decoded documents keyed by (collection name, id). Every write below
+        # refreshes or invalidates its entry so hot reads never touch disk.
+        self.cache = LRUCache(maxsize=cache_size, ttl=cache_ttl)
 
-class ChromaDBClient:
-    def __init__(self, persist_directory: str = "./chroma_db"):
         self.client = chromadb.PersistentClient(
             path=persist_directory,
             settings=Settings(
@@ -17,26 +58,141 @@ class ChromaDBClient:
             )
         )
         
-        self.users_collection = self.client.get_or_create_collection(
-            name="users",
-            metadata={"description": "Store user data"}
-        )
-        
-        self.sessions_collection = self.client.get_or_create_collection(
-            name="sessions",
-            metadata={"description": "Store session data"}
-        )
-        
-        self.questions_collection = self.client.get_or_create_collection(
-            name="questions",
-            metadata={"description": "Store question data"}
+        self.users_collection = self._get_or_create_collection("users")
+        self.sessions_collection = self._get_or_create_collection("sessions")
+        self.questions_collection = self._get_or_create_collection("questions")
+        self.assistant_history_collection = self._get_or_create_collection("assistant_history")
+        self.question_state_collection = self._get_or_create_collection("question_state")
+        self.assistant_messages_collection = self._get_or_create_collection("assistant_messages")
+        self._append_lock = threading.Lock()
+
+        if storage_mode == "records" and migrate_legacy:
+            self.migrate_legacy_collections()
+
+    def _collection_name(self, name: str) -> str:
+        if self.storage_mode == "records":
+            return f"{name}_records"
+        return name
+
+    def _get_or_create_collection(self, name: str):
+        if self.storage_mode == "records":
+            return self.client.get_or_create_collection(
+                name=self._collection_name(name),
+                embedding_function=None,
+                metadata={"description": COLLECTIONS[name], "storage_mode": "records"}
+            )
+        return self.client.get_or_create_collection(
+            name=name,
+            metadata={"description": COLLECTIONS[name]}
         )
-        
-        self.assistant_history_collection = self.client.get_or_create_collection(
-            name="assistant_history",
-            metadata={"description": "Store assistant conversation history"}
+
+    def _embeddings(self, count: int) -> Optional[List[List[float]]]:
+        if self.storage_mode == "records":
+            return [RECORD_EMBEDDING] * count
+        return None
+
+    def migrate_legacy_collections(self, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Copy records from the embedding-backed collections of older ./chroma_db
+        directories into their "_records" counterparts. A collection is only
+        migrated while its target is still empty, so this is safe to run on
+        every startup. Legacy collections are left in place for rollback.
+        Legacy questions carry their state inline; it is moved to question
+        state records so the content documents hold content only.
+        """
+        existing = {collection.name for collection in self.client.list_collections()}
+        migrated = {}
+
+        # State records first: they are newer than the state inline in questions
+        for name in sorted(COLLECTIONS, key=lambda name: name != "question_state"):
+            target = self._get_or_create_collection(name)
+            if name not in existing or target.count() > 0:
+                continue
+
+            legacy = self.client.get_collection(name=name, embedding_function=None)
+            copied = 0
+            while True:
+                result = legacy.get(
+                    limit=batch_size,
+                    offset=copied,
+                    include=["documents", "metadatas"]
+                )
+                if not result["ids"]:
+                    break
+
+                documents, metadatas = result["documents"], result["metadatas"]
+                if name == "questions":
+                    documents, metadatas = self._split_legacy_questions(result["ids"], documents, metadatas)
+
+                target.add(
+                    ids=result["ids"],
+                    documents=documents,
+                    metadatas=metadatas,
+                    embeddings=self._embeddings(len(result["ids"]))
+                )
+                copied += len(result["ids"])
+
+            migrated[name] = copied
+            if copied:
+                logger.info("Migrated %d records from '%s' to '%s'", copied, name, target.name)
+
+        return migrated
+
+    def _split_legacy_questions(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Optional[Dict[str, Any]]]
+    ) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Move inline state out of legacy question documents into state records"""
+        has_state = set(self.question_state_collection.get(ids=ids, include=[])["ids"])
+        contents, content_metadatas, state_ids, state_metadatas = [], [], [], []
+        for question_id, document, metadata in zip(ids, documents, metadatas):
+            question_dict = json.loads(document)
+            metadata = {key: value for key, value in (metadata or {}).items() if key not in QUESTION_STATE_FIELDS}
+            contents.append(json.dumps(self._question_content(question_dict)))
+            content_metadatas.append(metadata)
+            if question_id in has_state:
+                continue
+
+            state = {field: question_dict.get(field) for field in QUESTION_STATE_FIELDS}
+            if metadata.get("session_id"):
+                state["session_id"] = metadata["session_id"]
+            state_ids.append(question_id)
+            state_metadatas.append({
+                field: value for field, value in self._encode_question_state(state).items()
+                if value is not None
+            })
+
+        if state_ids:
+            self.question_state_collection.upsert(
+                ids=state_ids,
+                metadatas=state_metadatas,
+                embeddings=[RECORD_EMBEDDING] * len(state_ids)
+            )
+        return contents, content_metadatas
+
+    def _get_document(self, collection, document_id: str) -> Optional[Dict[str, Any]]:
+        key = (collection.name, document_id)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        generation = self.cache.generation()
+        result = collection.get(
+            ids=[document_id],
+            include=["documents"]
         )
 
+        if result["ids"]:
+            document = json.loads(result["documents"][0])
+            self.cache.fill(key, document, generation)
+            return document
+        return None
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
     def add_user(self, user: User) -> None:
         user_dict = user.model_dump()
         user_dict['created_at'] = user_dict['created_at'].isoformat()
@@ -47,32 +203,32 @@ class ChromaDBClient:
             metadatas=[{
                 "email": user.email,
                 "created_at": user_dict['created_at']
-            }]
+            }],
+            embeddings=self._embeddings(1)
         )
+        self.cache.invalidate((self.users_collection.name, user.id))
 
     def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
-        result = self.users_collection.get(
-            ids=[user_id],
-            include=["documents", "metadatas"]
-        )
-        
-        if result["ids"]:
-            return json.loads(result["documents"][0])
-        return None
+        return self._get_document(self.users_collection, user_id)
 
     def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        generation = self.cache.generation()
         result = self.users_collection.get(
             where={"email": email},
             include=["documents", "metadatas"]
         )
         
         if result["ids"]:
-            return json.loads(result["documents"][0])
+            user_data = json.loads(result["documents"][0])
+            self.cache.fill((self.users_collection.name, result["ids"][0]), user_data, generation)
+            return user_data
         return None
 
     def update_user_sessions(self, user_id: str, session_id: str) -> None:
         user_data = self.get_user(user_id)
         if user_data:
+            # Cached documents are shared, so build a new dict instead of mutating
+            user_data = {**user_data, "session_ids": list(user_data["session_ids"])}
             if session_id not in user_data["session_ids"]:
                 user_data["session_ids"].append(session_id)
             
@@ -82,14 +238,10 @@ class ChromaDBClient:
                 metadatas=[{
                     "email": user_data["email"],
                     "created_at": user_data["created_at"]
-                }]
+                }],
+                embeddings=self._embeddings(1)
             )
-
-    def get_user_sessions(self, user_id: str) -> List[str]:
-        user_data = self.get_user(user_id)
-        if user_data:
-            return user_data.get("session_ids", [])
-        return []
+            self.cache.set((self.users_collection.name, user_id), user_data)
 
     def add_session(self, session: Session) -> None:
         session_dict = session.model_dump()
@@ -103,28 +255,42 @@ class ChromaDBClient:
                 "mode": session.mode,
                 "num_questions": session.num_questions,
                 "created_at": session_dict['created_at']
-            }]
+            }],
+            embeddings=self._embeddings(1)
         )
+        self.cache.invalidate((self.sessions_collection.name, session.id))
 
-    def add_question(self, question: Question, session_id: Optional[str] = None) -> None:
-        question_dict = question.model_dump()
-        
+    def _question_content(self, question_dict: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in question_dict.items() if key not in QUESTION_STATE_FIELDS}
+
+    def _question_metadata(self, question_dict: Dict[str, Any], session_id: Optional[str] = None) -> Dict[str, Any]:
         metadata = {
-            "subject": question.question.subject,
-            "topic": question.question.topic,
-            "difficulty": question.question.difficulty,
-            "is_completed": question.is_completed,
-            "points": question.points,
+            "subject": question_dict["question"]["subject"],
+            "topic": question_dict["question"]["topic"],
+            "difficulty": question_dict["question"]["difficulty"],
+            "points": question_dict["points"],
         }
-        
+
         if session_id:
             metadata["session_id"] = session_id
-        
-        self.questions_collection.add(
-            ids=[question.id],
-            documents=[json.dumps(question_dict)],
-            metadatas=[metadata]
-        )
+        return metadata
+
+    def _encode_question_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        # None removes the key from the stored metadata
+        metadata = {}
+        for field, value in state.items():
+            if field == "student_answer" and value is not None:
+                value = json.dumps(value)
+            metadata[field] = value
+        return metadata
+
+    def _decode_question_state(self, metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        state = {}
+        for field in QUESTION_STATE_FIELDS:
+            if metadata and field in metadata:
+                value = metadata[field]
+                state[field] = json.loads(value) if field == "student_answer" else value
+        return state
 
     def add_questions_batch(self, questions: List[Question], session_id: Optional[str] = None) -> None:
         if not questions:
@@ -133,87 +299,155 @@ class ChromaDBClient:
         ids = []
         documents = []
         metadatas = []
+        state_metadatas = []
         
         for question in questions:
             question_dict = question.model_dump()
             
-            metadata = {
-                "subject": question.question.subject,
-                "topic": question.question.topic,
-                "difficulty": question.question.difficulty,
-                "is_completed": question.is_completed,
-                "points": question.points,
-            }
-            
-            if session_id:
-                metadata["session_id"] = session_id
-            
             ids.append(question.id)
-            documents.append(json.dumps(question_dict))
-            metadatas.append(metadata)
+            documents.append(json.dumps(self._question_content(question_dict)))
+            metadatas.append(self._question_metadata(question_dict, session_id))
+
+            state = {field: question_dict.get(field) for field in QUESTION_STATE_FIELDS}
+            if session_id:
+                state["session_id"] = session_id
+            state_metadatas.append({
+                field: value for field, value in self._encode_question_state(state).items()
+                if value is not None
+            })
         
         self.questions_collection.add(
             ids=ids,
             documents=documents,
-            metadatas=metadatas
+            metadatas=metadatas,
+            embeddings=self._embeddings(len(ids))
+        )
+        self.question_state_collection.upsert(
+            ids=ids,
+            metadatas=state_metadatas,
+            embeddings=[RECORD_EMBEDDING] * len(ids)
         )
+        for question_id in ids:
+            self.cache.invalidate((self.questions_collection.name, question_id))
+            self.cache.invalidate((self.question_state_collection.name, question_id))
 
     def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
-        result = self.sessions_collection.get(
-            ids=[session_id],
-            include=["documents", "metadatas"]
-        )
-        
-        if result["ids"]:
-            return json.loads(result["documents"][0])
-        return None
+        return self._get_document(self.sessions_collection, session_id)
 
-    def get_question(self, question_id: str) -> Optional[Dict[str, Any]]:
-        result = self.questions_collection.get(
+    def get_question_state(self, question_id: str) -> Optional[Dict[str, Any]]:
+        key = (self.question_state_collection.name, question_id)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        generation = self.cache.generation()
+        result = self.question_state_collection.get(
             ids=[question_id],
-            include=["documents", "metadatas"]
+            include=["metadatas"]
         )
-        
+
         if result["ids"]:
-            return json.loads(result["documents"][0])
+            state = self._decode_question_state(result["metadatas"][0])
+            self.cache.fill(key, state, generation)
+            return state
         return None
 
-    def get_questions_by_session(self, session_id: str) -> List[Dict[str, Any]]:
+    def question_exists(self, question_id: str) -> bool:
+        # The state record is small and cached; only questions written before
+        # the state split need the content lookup
+        if self.get_question_state(question_id) is not None:
+            return True
+        return self._get_document(self.questions_collection, question_id) is not None
+
+    def get_question(self, question_id: str) -> Optional[Dict[str, Any]]:
+        content = self._get_document(self.questions_collection, question_id)
+        if content is None:
+            return None
+
+        # Questions written before the state split carry their state inline;
+        # once a question has a state record, that is its only state
+        state = self.get_question_state(question_id)
+        if state is None:
+            return {**QUESTION_STATE_DEFAULTS, **content}
+        return {**QUESTION_STATE_DEFAULTS, **self._question_content(content), **state}
+
+    def get_questions_by_session(
+        self,
+        session_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Page through a session's questions in insertion order. `fields` is a list
+        of dotted paths to return (see projection.project); per-attempt state is
+        only fetched when the projection asks for it.
+        """
         result = self.questions_collection.get(
             where={"session_id": session_id},
-            include=["documents", "metadatas"]
+            offset=offset,
+            limit=limit,
+            include=["documents"]
         )
+        if not result["ids"]:
+            return []
+
+        state_by_id = {}
+        if needs_any(fields, QUESTION_STATE_FIELDS):
+            states = self.question_state_collection.get(
+                ids=result["ids"],
+                include=["metadatas"]
+            )
+            state_by_id = {
+                question_id: self._decode_question_state(metadata)
+                for question_id, metadata in zip(states["ids"], states["metadatas"])
+            }
         
-        return [json.loads(doc) for doc in result["documents"]]
+        questions = []
+        for question_id, doc in zip(result["ids"], result["documents"]):
+            content = json.loads(doc)
+            if question_id in state_by_id:
+                content = {**self._question_content(content), **state_by_id[question_id]}
+            questions.append(project({**QUESTION_STATE_DEFAULTS, **content}, fields))
+        return questions
 
     def query_questions(
         self, 
         subject: Optional[str] = None,
         difficulty: Optional[str] = None,
         topic: Optional[str] = None,
-        limit: int = 10
+        limit: int = 10,
+        offset: int = 0,
+        fields: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
-        where_filter = {}
+        conditions = []
         
         if subject:
-            where_filter["subject"] = subject
+            conditions.append({"subject": subject})
         if difficulty:
-            where_filter["difficulty"] = difficulty
+            conditions.append({"difficulty": difficulty})
         if topic:
-            where_filter["topic"] = topic
+            conditions.append({"topic": topic})
+        
+        where_filter = None
+        if len(conditions) == 1:
+            where_filter = conditions[0]
+        elif conditions:
+            where_filter = {"$and": conditions}
         
         result = self.questions_collection.get(
-            where=where_filter if where_filter else None,
+            where=where_filter,
             limit=limit,
-            include=["documents", "metadatas"]
+            offset=offset,
+            include=["documents"]
         )
         
-        return [json.loads(doc) for doc in result["documents"]]
+        return [project(json.loads(doc), fields) for doc in result["documents"]]
 
     def update_session_status(self, session_id: str, status: str, score: Optional[float] = None) -> None:
         session_data = self.get_session(session_id)
         if session_data:
-            session_data["status"] = status
+            session_data = {**session_data, "status": status}
             if score is not None:
                 session_data["score"] = score
             
@@ -225,132 +459,228 @@ class ChromaDBClient:
                     "mode": session_data["mode"],
                     "num_questions": session_data["num_questions"],
                     "created_at": session_data["created_at"]
-                }]
+                }],
+                embeddings=self._embeddings(1)
             )
+            self.cache.set((self.sessions_collection.name, session_id), session_data)
 
-    def update_question_completion(self, question_id: str, is_completed: bool, points_earned: int) -> None:
-        question_data = self.get_question(question_id)
-        if question_data:
-            question_data["is_completed"] = is_completed
-            question_data["points_earned"] = points_earned
-            
-            self.questions_collection.update(
-                ids=[question_id],
-                documents=[json.dumps(question_data)],
-                metadatas=[{
-                    "subject": question_data["question"]["subject"],
-                    "topic": question_data["question"]["topic"],
-                    "difficulty": question_data["question"]["difficulty"],
-                    "is_completed": is_completed,
-                    "points": question_data["points"],
-                }]
-            )
+    def update_question_state(self, question_id: str, **fields) -> None:
+        self.update_questions_state({question_id: fields})
 
-    def update_question_answer(self, question_id: str, student_answer) -> None:
-        question_data = self.get_question(question_id)
-        if question_data:
-            question_data["student_answer"] = student_answer
-            
-            self.questions_collection.update(
-                ids=[question_id],
-                documents=[json.dumps(question_data)],
-                metadatas=[{
-                    "subject": question_data["question"]["subject"],
-                    "topic": question_data["question"]["topic"],
-                    "difficulty": question_data["question"]["difficulty"],
-                    "is_completed": question_data.get("is_completed", False),
-                    "points": question_data["points"],
-                }]
-            )
+    def update_questions_state(self, states: Dict[str, Dict[str, Any]]) -> None:
+        states = {question_id: fields for question_id, fields in states.items() if fields}
+        if not states:
+            return
+        for fields in states.values():
+            unknown = set(fields) - set(QUESTION_STATE_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown question state fields: {sorted(unknown)}")
 
-    def update_question(self, question_id: str, question_data: dict) -> None:
+        self.question_state_collection.upsert(
+            ids=list(states),
+            metadatas=[self._encode_question_state(fields) for fields in states.values()],
+            embeddings=[RECORD_EMBEDDING] * len(states)
+        )
+
+        for question_id, fields in states.items():
+            key = (self.question_state_collection.name, question_id)
+            generation = self.cache.generation()
+            cached = self.cache.get(key)
+            if cached is not None and "student_answer" not in fields:
+                # Another write since the read would make the merge stale
+                if not self.cache.fill(key, {**cached, **fields}, generation):
+                    self.cache.invalidate(key)
+            else:
+                # Answers may contain tuples, which don't survive the JSON round trip
+                self.cache.invalidate(key)
+
+    def _write_question(self, question_id: str, question_data: dict) -> None:
         self.questions_collection.update(
             ids=[question_id],
-            documents=[json.dumps(question_data)],
-            metadatas=[{
-                "subject": question_data["question"]["subject"],
-                "topic": question_data["question"]["topic"],
-                "difficulty": question_data["question"]["difficulty"],
-                "is_completed": question_data.get("is_completed", False),
-                "points": question_data["points"],
-            }]
+            documents=[json.dumps(self._question_content(question_data))],
+            metadatas=[self._question_metadata(question_data)],
+            embeddings=self._embeddings(1)
+        )
+        self.cache.invalidate((self.questions_collection.name, question_id))
+        self.update_question_state(
+            question_id,
+            **{field: question_data.get(field) for field in QUESTION_STATE_FIELDS}
         )
 
+    def _message_id(self, conversation_id: str, seq: int) -> str:
+        return f"{conversation_id}:{seq:08d}"
+
     def add_assistant_conversation(self, conversation: AssistantConversation) -> None:
-        conversation_dict = conversation.model_dump()
-        conversation_dict['created_at'] = conversation_dict['created_at'].isoformat()
-        conversation_dict['updated_at'] = conversation_dict['updated_at'].isoformat()
-        
-        # Convert messages to serializable format
-        for message in conversation_dict['messages']:
-            message['timestamp'] = message['timestamp'].isoformat()
-        
+        header = {
+            "id": conversation.id,
+            "user_id": conversation.user_id,
+            "question_id": conversation.question_id,
+            "session_id": conversation.session_id,
+            "created_at": conversation.created_at.isoformat(),
+            "updated_at": conversation.updated_at.isoformat(),
+            "message_count": 0,
+        }
+
         self.assistant_history_collection.add(
             ids=[conversation.id],
-            documents=[json.dumps(conversation_dict)],
+            documents=[json.dumps(header)],
+            # Chroma rejects None metadata values, so unset links are left out
             metadatas=[{
-                "user_id": conversation.user_id,
-                "question_id": conversation.question_id,
-                "session_id": conversation.session_id,
-                "created_at": conversation_dict['created_at'],
-                "updated_at": conversation_dict['updated_at']
-            }]
+                key: value for key, value in {
+                    "user_id": conversation.user_id,
+                    "question_id": conversation.question_id,
+                    "session_id": conversation.session_id,
+                    "created_at": header['created_at'],
+                    "updated_at": header['updated_at']
+                }.items() if value is not None
+            }],
+            embeddings=self._embeddings(1)
         )
+        self.cache.set((self.assistant_history_collection.name, conversation.id), header)
+
+        if conversation.messages:
+            self.append_assistant_messages(conversation.id, conversation.messages, conversation.updated_at)
 
     def get_assistant_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
-        result = self.assistant_history_collection.get(
-            ids=[conversation_id],
-            include=["documents", "metadatas"]
-        )
-        
-        if result["ids"]:
-            return json.loads(result["documents"][0])
-        return None
+        return self._get_document(self.assistant_history_collection, conversation_id)
 
-    def update_assistant_conversation(self, conversation_id: str, conversation: AssistantConversation) -> None:
-        conversation_dict = conversation.model_dump()
-        conversation_dict['created_at'] = conversation_dict['created_at'].isoformat()
-        conversation_dict['updated_at'] = conversation_dict['updated_at'].isoformat()
-        
-        # Convert messages to serializable format
-        for message in conversation_dict['messages']:
-            message['timestamp'] = message['timestamp'].isoformat()
-        
-        self.assistant_history_collection.update(
-            ids=[conversation_id],
-            documents=[json.dumps(conversation_dict)],
-            metadatas=[{
-                "user_id": conversation.user_id,
-                "question_id": conversation.question_id,
-                "session_id": conversation.session_id,
-                "created_at": conversation_dict['created_at'],
-                "updated_at": conversation_dict['updated_at']
-            }]
-        )
+    def append_assistant_messages(
+        self,
+        conversation_id: str,
+        messages: List[AssistantMessage],
+        updated_at: datetime
+    ) -> int:
+        with self._append_lock:
+            header = self.get_assistant_conversation(conversation_id)
+            if header is None:
+                raise KeyError(f"Conversation {conversation_id} not found")
 
-    def get_assistant_conversations_by_user(self, user_id: str) -> List[Dict[str, Any]]:
-        result = self.assistant_history_collection.get(
-            where={"user_id": user_id},
-            include=["documents", "metadatas"]
-        )
-        
-        return [json.loads(doc) for doc in result["documents"]]
+            legacy_messages = []
+            if "messages" in header:
+                # Conversations written before the message log keep their history
+                # inline; move it into the log on first append
+                legacy_messages = header["messages"]
+                header = {key: value for key, value in header.items() if key != "messages"}
 
-    def get_assistant_conversations_by_question(self, question_id: str) -> List[Dict[str, Any]]:
-        result = self.assistant_history_collection.get(
-            where={"question_id": question_id},
-            include=["documents", "metadatas"]
+            start = header.get("message_count", 0)
+            records = legacy_messages + [
+                {
+                    "role": message.role,
+                    "content": message.content,
+                    "timestamp": message.timestamp.isoformat(),
+                }
+                for message in messages
+            ]
+            if not records:
+                return start
+
+            seqs = range(start, start + len(records))
+            self.assistant_messages_collection.add(
+                ids=[self._message_id(conversation_id, seq) for seq in seqs],
+                documents=[record["content"] for record in records],
+                metadatas=[
+                    {
+                        "conversation_id": conversation_id,
+                        "seq": seq,
+                        "role": record["role"],
+                        "timestamp": record["timestamp"],
+                    }
+                    for seq, record in zip(seqs, records)
+                ],
+                embeddings=[RECORD_EMBEDDING] * len(records)
+            )
+
+            header = {**header, "message_count": start + len(records), "updated_at": updated_at.isoformat()}
+            self.assistant_history_collection.update(
+                ids=[conversation_id],
+                documents=[json.dumps(header)],
+                metadatas=[{"updated_at": header["updated_at"]}],
+                embeddings=self._embeddings(1)
+            )
+            self.cache.set((self.assistant_history_collection.name, conversation_id), header)
+            return header["message_count"]
+
+    def get_assistant_messages(
+        self,
+        conversation_id: str,
+        limit: Optional[int] = None,
+        before: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        if fields is not None and "seq" not in fields:
+            fields = [*fields, "seq"]
+
+        header = self.get_assistant_conversation(conversation_id)
+        if header is None:
+            return []
+
+        if "messages" in header:
+            messages = [{**message, "seq": seq} for seq, message in enumerate(header["messages"])]
+            end = len(messages) if before is None else min(before, len(messages))
+            start = max(0, end - limit) if limit is not None else 0
+            return [project(message, fields) for message in messages[start:end]]
+
+        count = header.get("message_count", 0)
+        end = count if before is None else min(before, count)
+        start = max(0, end - limit) if limit is not None else 0
+        if start >= end:
+            return []
+
+        result = self.assistant_messages_collection.get(
+            ids=[self._message_id(conversation_id, seq) for seq in range(start, end)],
+            include=["documents", "metadatas"] if needs_any(fields, ("content",)) else ["metadatas"]
         )
-        
-        return [json.loads(doc) for doc in result["documents"]]
+        messages = [
+            {
+                "role": metadata["role"],
+                "content": document,
+                "timestamp": metadata["timestamp"],
+                "seq": metadata["seq"],
+            }
+            for document, metadata in zip(result["documents"] or [None] * len(result["ids"]), result["metadatas"])
+        ]
+        messages.sort(key=lambda message: message["seq"])
+        return [project(message, fields) for message in messages]
 
-    def get_assistant_conversations_by_session(self, session_id: str) -> List[Dict[str, Any]]:
+    def _get_assistant_conversations(
+        self,
+        where: Dict[str, Any],
+        offset: int,
+        limit: Optional[int],
+        fields: Optional[List[str]]
+    ) -> List[Dict[str, Any]]:
         result = self.assistant_history_collection.get(
-            where={"session_id": session_id},
-            include=["documents", "metadatas"]
+            where=where,
+            offset=offset,
+            limit=limit,
+            include=["documents"]
         )
         
-        return [json.loads(doc) for doc in result["documents"]]
+        return [project(json.loads(doc), fields) for doc in result["documents"]]
 
-db_client = ChromaDBClient()
+    def get_assistant_conversations_by_user(
+        self,
+        user_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        return self._get_assistant_conversations({"user_id": user_id}, offset, limit, fields)
+
+    def get_assistant_conversations_by_question(
+        self,
+        question_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        return self._get_assistant_conversations({"question_id": question_id}, offset, limit, fields)
 
+    def get_assistant_conversations_by_session(
+        self,
+        session_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        return self._get_assistant_conversations({"session_id": session_id}, offset, limit, fields)
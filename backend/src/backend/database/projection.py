@@ -0,0 +1,36 @@
+from typing import Any, Dict, List, Optional
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma separated `fields` query parameter into a list of dotted paths"""
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+def project(document: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """
+    Keep only the given dotted paths of a document, e.g.
+    ["id", "question.text", "question.data.type"]. Missing paths are skipped.
+    """
+    if fields is None:
+        return document
+
+    projected: Dict[str, Any] = {}
+    for field in fields:
+        value: Any = document
+        parts = field.split(".")
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = projected
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+    return projected
+
+def needs_any(fields: Optional[List[str]], keys) -> bool:
+    """Whether a projection touches any of the given top-level keys"""
+    if fields is None:
+        return True
+    return any(field.split(".")[0] in keys for field in fields)
@@ -0,0 +1,532 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from .base import QUESTION_STATE_DEFAULTS, QUESTION_STATE_FIELDS, Storage
+from .projection import needs_any, project
+from ..models.session import Session
+from ..models.question import Question
+from ..models.user import User
+from ..models.assistant import AssistantConversation, AssistantMessage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL,
+    document TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email ON users (email);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    document TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS questions (
+    id TEXT PRIMARY KEY,
+    session_id TEXT,
+    subject TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    document TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_questions_session_id ON questions (session_id);
+CREATE INDEX IF NOT EXISTS idx_questions_subject ON questions (subject, difficulty, topic);
+
+CREATE TABLE IF NOT EXISTS question_state (
+    question_id TEXT PRIMARY KEY,
+    student_answer TEXT,
+    is_completed INTEGER NOT NULL DEFAULT 0,
+    points_earned NUMERIC,
+    is_correct INTEGER,
+    graded_answer_hash TEXT,
+    grader_version TEXT
+);
+
+CREATE TABLE IF NOT EXISTS assistant_conversations (
+    id TEXT PRIMARY KEY,
+    user_id TEXT,
+    question_id TEXT,
+    session_id TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_conversations_user_id ON assistant_conversations (user_id);
+CREATE INDEX IF NOT EXISTS idx_conversations_question_id ON assistant_conversations (question_id);
+CREATE INDEX IF NOT EXISTS idx_conversations_session_id ON assistant_conversations (session_id);
+
+CREATE TABLE IF NOT EXISTS assistant_messages (
+    conversation_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    PRIMARY KEY (conversation_id, seq)
+) WITHOUT ROWID;
+"""
+
+# Columns added to question_state after its first release, for existing databases
+QUESTION_STATE_MIGRATIONS = {
+    "is_correct": "INTEGER",
+    "graded_answer_hash": "TEXT",
+    "grader_version": "TEXT",
+}
+STATE_SELECT = ", ".join(f"s.{field}" for field in QUESTION_STATE_FIELDS)
+
+CONVERSATION_COLUMNS = ("id", "user_id", "question_id", "session_id", "created_at", "updated_at", "message_count")
+
+class SQLiteClient(Storage):
+    """
+    Relational storage on an embedded SQLite database in WAL mode. Each thread
+    gets its own connection, so the client is safe to use from the async
+    facade's thread pool; WAL lets readers run alongside the single writer.
+    """
+    def __init__(self, path: str = "./platypus.db"):
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(question_state)")}
+            for column, column_type in QUESTION_STATE_MIGRATIONS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE question_state ADD COLUMN {column} {column_type}")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            self._local.conn = conn
+        return conn
+
+    def _fetchone(self, sql: str, params=()) -> Optional[tuple]:
+        return self._connection().execute(sql, params).fetchone()
+
+    def _fetchall(self, sql: str, params=()) -> List[tuple]:
+        return self._connection().execute(sql, params).fetchall()
+
+    def _page(self, offset: int, limit: Optional[int]) -> str:
+        # SQLite needs a LIMIT before OFFSET; -1 means no limit
+        return f" LIMIT {int(limit) if limit is not None else -1} OFFSET {int(offset)}"
+
+    # Users
+
+    def add_user(self, user: User) -> None:
+        user_dict = user.model_dump()
+        user_dict['created_at'] = user_dict['created_at'].isoformat()
+
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO users (id, email, document) VALUES (?, ?, ?)",
+                (user.id, user.email, json.dumps(user_dict))
+            )
+
+    def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        row = self._fetchone("SELECT document FROM users WHERE id = ?", (user_id,))
+        return json.loads(row[0]) if row else None
+
+    def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        row = self._fetchone("SELECT document FROM users WHERE email = ?", (email,))
+        return json.loads(row[0]) if row else None
+
+    def update_user_sessions(self, user_id: str, session_id: str) -> None:
+        with self._connection() as conn:
+            row = conn.execute("SELECT document FROM users WHERE id = ?", (user_id,)).fetchone()
+            if row is None:
+                return
+
+            user_data = json.loads(row[0])
+            if session_id not in user_data["session_ids"]:
+                user_data["session_ids"].append(session_id)
+                conn.execute(
+                    "UPDATE users SET document = ? WHERE id = ?",
+                    (json.dumps(user_data), user_id)
+                )
+
+    # Sessions
+
+    def add_session(self, session: Session) -> None:
+        session_dict = session.model_dump()
+        session_dict['created_at'] = session_dict['created_at'].isoformat()
+
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO sessions (id, document) VALUES (?, ?)",
+                (session.id, json.dumps(session_dict))
+            )
+
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        row = self._fetchone("SELECT document FROM sessions WHERE id = ?", (session_id,))
+        return json.loads(row[0]) if row else None
+
+    def _write_session_status(self, conn: sqlite3.Connection, session_id: str, status: str, score: Optional[float]) -> None:
+        row = conn.execute("SELECT document FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            return
+
+        session_data = json.loads(row[0])
+        session_data["status"] = status
+        if score is not None:
+            session_data["score"] = score
+        conn.execute(
+            "UPDATE sessions SET document = ? WHERE id = ?",
+            (json.dumps(session_data), session_id)
+        )
+
+    def update_session_status(self, session_id: str, status: str, score: Optional[float] = None) -> None:
+        with self._connection() as conn:
+            self._write_session_status(conn, session_id, status, score)
+
+    # Questions
+
+    def _decode_state(self, row: tuple) -> Dict[str, Any]:
+        state = dict(zip(QUESTION_STATE_FIELDS, row))
+        if state["student_answer"] is not None:
+            state["student_answer"] = json.loads(state["student_answer"])
+        state["is_completed"] = bool(state["is_completed"])
+        if state["is_correct"] is not None:
+            state["is_correct"] = bool(state["is_correct"])
+        return state
+
+    def _encode_state(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        values = dict(fields)
+        if values.get("student_answer") is not None:
+            values["student_answer"] = json.dumps(values["student_answer"])
+        if "is_completed" in values:
+            values["is_completed"] = int(bool(values["is_completed"]))
+        if values.get("is_correct") is not None:
+            values["is_correct"] = int(values["is_correct"])
+        return values
+
+    def add_questions_batch(self, questions: List[Question], session_id: Optional[str] = None) -> None:
+        if not questions:
+            return
+
+        question_rows = []
+        state_rows = []
+        for question in questions:
+            question_dict = question.model_dump()
+            content = {key: value for key, value in question_dict.items() if key not in QUESTION_STATE_FIELDS}
+
+            question_rows.append((
+                question.id,
+                session_id,
+                question.question.subject,
+                question.question.topic,
+                question.question.difficulty,
+                json.dumps(content),
+            ))
+            state = self._encode_state({field: question_dict.get(field) for field in QUESTION_STATE_FIELDS})
+            state_rows.append((question.id, *(state[field] for field in QUESTION_STATE_FIELDS)))
+
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT INTO questions (id, session_id, subject, topic, difficulty, document) VALUES (?, ?, ?, ?, ?, ?)",
+                question_rows
+            )
+            conn.executemany(
+                f"""
+                INSERT OR REPLACE INTO question_state (question_id, {', '.join(QUESTION_STATE_FIELDS)})
+                VALUES (?, {', '.join('?' for _ in QUESTION_STATE_FIELDS)})
+                """,
+                state_rows
+            )
+
+    def get_question_state(self, question_id: str) -> Optional[Dict[str, Any]]:
+        row = self._fetchone(
+            f"SELECT {', '.join(QUESTION_STATE_FIELDS)} FROM question_state WHERE question_id = ?",
+            (question_id,)
+        )
+        return self._decode_state(row) if row else None
+
+    def question_exists(self, question_id: str) -> bool:
+        return self._fetchone("SELECT 1 FROM questions WHERE id = ?", (question_id,)) is not None
+
+    def get_question(self, question_id: str) -> Optional[Dict[str, Any]]:
+        row = self._fetchone(
+            f"""
+            SELECT q.document, s.question_id, {STATE_SELECT}
+            FROM questions q LEFT JOIN question_state s ON s.question_id = q.id
+            WHERE q.id = ?
+            """,
+            (question_id,)
+        )
+        if row is None:
+            return None
+
+        state = self._decode_state(row[2:]) if row[1] is not None else {}
+        return {**QUESTION_STATE_DEFAULTS, **json.loads(row[0]), **state}
+
+    def get_questions_by_session(
+        self,
+        session_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        if not needs_any(fields, QUESTION_STATE_FIELDS):
+            rows = self._fetchall(
+                "SELECT document FROM questions WHERE session_id = ? ORDER BY rowid" + self._page(offset, limit),
+                (session_id,)
+            )
+            return [project(json.loads(row[0]), fields) for row in rows]
+
+        rows = self._fetchall(
+            f"""
+            SELECT q.document, s.question_id, {STATE_SELECT}
+            FROM questions q LEFT JOIN question_state s ON s.question_id = q.id
+            WHERE q.session_id = ? ORDER BY q.rowid
+            """ + self._page(offset, limit),
+            (session_id,)
+        )
+        return [
+            project(
+                {
+                    **QUESTION_STATE_DEFAULTS,
+                    **json.loads(row[0]),
+                    **(self._decode_state(row[2:]) if row[1] is not None else {}),
+                },
+                fields
+            )
+            for row in rows
+        ]
+
+    def query_questions(
+        self,
+        subject: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        topic: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        conditions = []
+        params = []
+        for column, value in (("subject", subject), ("difficulty", difficulty), ("topic", topic)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._fetchall(
+            f"SELECT document FROM questions{where} ORDER BY rowid" + self._page(offset, limit),
+            params
+        )
+        return [project(json.loads(row[0]), fields) for row in rows]
+
+    def _write_questions_state(self, conn: sqlite3.Connection, states: Dict[str, Dict[str, Any]]) -> None:
+        for fields in states.values():
+            unknown = set(fields) - set(QUESTION_STATE_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown question state fields: {sorted(unknown)}")
+
+        # One upsert statement per distinct set of fields being written
+        groups: Dict[Tuple[str, ...], List[tuple]] = {}
+        for question_id, fields in states.items():
+            if fields:
+                values = self._encode_state(fields)
+                groups.setdefault(tuple(values), []).append((question_id, *values.values()))
+
+        for columns, rows in groups.items():
+            conn.executemany(
+                f"""
+                INSERT INTO question_state (question_id, {', '.join(columns)})
+                VALUES (?, {', '.join('?' for _ in columns)})
+                ON CONFLICT (question_id) DO UPDATE SET
+                {', '.join(f'{column} = excluded.{column}' for column in columns)}
+                """,
+                rows
+            )
+
+    def update_question_state(self, question_id: str, **fields) -> None:
+        with self._connection() as conn:
+            self._write_questions_state(conn, {question_id: fields})
+
+    def update_questions_state(self, states: Dict[str, Dict[str, Any]]) -> None:
+        with self._connection() as conn:
+            self._write_questions_state(conn, states)
+
+    def update_question_answer(self, question_id: str, student_answer) -> bool:
+        # One conditional upsert: nothing is written for an unknown question
+        values = self._encode_state({"student_answer": student_answer})
+        with self._connection() as conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO question_state (question_id, student_answer)
+                SELECT ?, ? WHERE EXISTS (SELECT 1 FROM questions WHERE id = ?)
+                ON CONFLICT (question_id) DO UPDATE SET student_answer = excluded.student_answer
+                """,
+                (question_id, values["student_answer"], question_id)
+            )
+            return cursor.rowcount > 0
+
+    def save_session_grades(
+        self,
+        session_id: str,
+        states: Dict[str, Dict[str, Any]],
+        status: str,
+        score: Optional[float] = None
+    ) -> None:
+        # One transaction: either the whole graded session lands or none of it
+        with self._connection() as conn:
+            self._write_questions_state(conn, states)
+            self._write_session_status(conn, session_id, status, score)
+
+    def _write_question(self, question_id: str, question_data: dict) -> None:
+        content = {key: value for key, value in question_data.items() if key not in QUESTION_STATE_FIELDS}
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE questions SET subject = ?, topic = ?, difficulty = ?, document = ? WHERE id = ?",
+                (
+                    question_data["question"]["subject"],
+                    question_data["question"]["topic"],
+                    question_data["question"]["difficulty"],
+                    json.dumps(content),
+                    question_id,
+                )
+            )
+        self.update_question_state(
+            question_id,
+            **{field: question_data.get(field, QUESTION_STATE_DEFAULTS[field]) for field in QUESTION_STATE_FIELDS}
+        )
+
+    # Assistant conversations
+
+    def add_assistant_conversation(self, conversation: AssistantConversation) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO assistant_conversations
+                (id, user_id, question_id, session_id, created_at, updated_at, message_count)
+                VALUES (?, ?, ?, ?, ?, ?, 0)
+                """,
+                (
+                    conversation.id,
+                    conversation.user_id,
+                    conversation.question_id,
+                    conversation.session_id,
+                    conversation.created_at.isoformat(),
+                    conversation.updated_at.isoformat(),
+                )
+            )
+
+        if conversation.messages:
+            self.append_assistant_messages(conversation.id, conversation.messages, conversation.updated_at)
+
+    def get_assistant_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        row = self._fetchone(
+            f"SELECT {', '.join(CONVERSATION_COLUMNS)} FROM assistant_conversations WHERE id = ?",
+            (conversation_id,)
+        )
+        return dict(zip(CONVERSATION_COLUMNS, row)) if row else None
+
+    def append_assistant_messages(
+        self,
+        conversation_id: str,
+        messages: List[AssistantMessage],
+        updated_at: datetime
+    ) -> int:
+        conn = self._connection()
+        # IMMEDIATE takes the write lock up front so concurrent appends can't
+        # read the same message_count and collide on seq
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT message_count FROM assistant_conversations WHERE id = ?",
+                (conversation_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"Conversation {conversation_id} not found")
+
+            start = row[0]
+            conn.executemany(
+                "INSERT INTO assistant_messages (conversation_id, seq, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (conversation_id, seq, message.role, message.content, message.timestamp.isoformat())
+                    for seq, message in enumerate(messages, start)
+                ]
+            )
+            conn.execute(
+                "UPDATE assistant_conversations SET message_count = ?, updated_at = ? WHERE id = ?",
+                (start + len(messages), updated_at.isoformat(), conversation_id)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return start + len(messages)
+
+    def get_assistant_messages(
+        self,
+        conversation_id: str,
+        limit: Optional[int] = None,
+        before: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        if fields is not None and "seq" not in fields:
+            fields = [*fields, "seq"]
+
+        conditions = "conversation_id = ?"
+        params: List[Any] = [conversation_id]
+        if before is not None:
+            conditions += " AND seq < ?"
+            params.append(before)
+
+        rows = self._fetchall(
+            f"""
+            SELECT role, content, timestamp, seq FROM assistant_messages
+            WHERE {conditions} ORDER BY seq DESC
+            """ + self._page(0, limit),
+            params
+        )
+        return [
+            project({"role": role, "content": content, "timestamp": timestamp, "seq": seq}, fields)
+            for role, content, timestamp, seq in reversed(rows)
+        ]
+
+    def _get_assistant_conversations(
+        self,
+        column: str,
+        value: str,
+        offset: int,
+        limit: Optional[int],
+        fields: Optional[List[str]]
+    ) -> List[Dict[str, Any]]:
+        rows = self._fetchall(
+            f"SELECT {', '.join(CONVERSATION_COLUMNS)} FROM assistant_conversations WHERE {column} = ? ORDER BY rowid"
+            + self._page(offset, limit),
+            (value,)
+        )
+        return [project(dict(zip(CONVERSATION_COLUMNS, row)), fields) for row in rows]
+
+    def get_assistant_conversations_by_user(
+        self,
+        user_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        return self._get_assistant_conversations("user_id", user_id, offset, limit, fields)
+
+    def get_assistant_conversations_by_question(
+        self,
+        question_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        return self._get_assistant_conversations("question_id", question_id, offset, limit, fields)
+
+    def get_assistant_conversations_by_session(
+        self,
+        session_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        return self._get_assistant_conversations("session_id", session_id, offset, limit, fields)
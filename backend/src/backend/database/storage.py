@@ -0,0 +1,25 @@
+import os
+from .base import Storage
+
+def create_storage() -> Storage:
+    """
+    Build the storage backend selected by STORAGE_BACKEND ("chroma" or "sqlite").
+    Chroma stays the default so existing ./chroma_db deployments keep working.
+    """
+    backend = os.getenv("STORAGE_BACKEND", "chroma")
+
+    if backend == "sqlite":
+        from .sqlite_client import SQLiteClient
+        return SQLiteClient(os.getenv("SQLITE_PATH", "./platypus.db"))
+
+    if backend == "chroma":
+        from .chromadb_client import ChromaDBClient
+        return ChromaDBClient(
+            cache_size=int(os.getenv("DB_CACHE_SIZE", "1024")),
+            cache_ttl=float(os.getenv("DB_CACHE_TTL_SECONDS", "300")),
+            storage_mode=os.getenv("CHROMA_STORAGE_MODE", "records")
+        )
+
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+db_client = create_storage()
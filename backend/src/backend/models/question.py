@@ -60,7 +60,10 @@ class Question(BaseModel):
     student_answer: Optional[Any] = None
     is_completed: bool = False
     points: int = 1
-    points_earned: Optional[int] = None
+    points_earned: Optional[float] = None
+    is_correct: Optional[bool] = None
+    graded_answer_hash: Optional[str] = None # hash of the answer the stored grade is for
+    grader_version: Optional[str] = None
 
 class StudentAnswer(BaseModel):
     answer: str | bool | float | List[Tuple] | List[str] # depending on the question type
@@ -86,7 +89,7 @@ class AutoGradeRequest(BaseModel):
 
 class AutoGradeResponse(BaseModel):
     is_correct: bool
-    points_earned: int
+    points_earned: float
     max_points: int
     explanation: str
     correct_answer: str
@@ -94,6 +97,8 @@ class AutoGradeResponse(BaseModel):
 class TestResult(BaseModel):
     percentage: float
     total_points: int
-    points_earned: int
+    points_earned: float
     summary: str
-    improvements: List[str]
\ No newline at end of file
+    improvements: List[str]
+    regraded: int = 0 # questions graded by this request
+    reused: int = 0 # answered questions whose stored grade was still current
\ No newline at end of file
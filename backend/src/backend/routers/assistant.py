@@ -1,20 +1,18 @@
 import uuid
 import datetime
 import json
-import httpx
 import os
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import StreamingResponse
-from ..database.chromadb_client import db_client
+from ..database.async_client import async_db_client
+from ..services.agents_client import agents_client
+from ..database.projection import parse_fields
 from ..models.assistant import AssistantRequest, AssistantMessage, AssistantConversation
 from dotenv import load_dotenv
 
 load_dotenv()
 
-AGENTS_BASE = os.getenv("AGENTS_BASE_URL")
-if not AGENTS_BASE:
-    raise ValueError("AGENTS_BASE_URL is not set")
-
 router = APIRouter(prefix="/assistant", tags=["assistant"])
 
 async def stream_assistant_execution(request: AssistantRequest, conversation_id: str = None):
@@ -23,84 +21,73 @@ async def stream_assistant_execution(request: AssistantRequest, conversation_id:
         
         query = request.user_question
         if request.question_id:
-            question_data = db_client.get_question(request.question_id)
+            question_data = await async_db_client.get_question(request.question_id)
             if question_data:
                 query += f"\n\nQuestion: {question_data.get('question', '')}"
         if request.session_id:
-            session_data = db_client.get_session(request.session_id)
+            session_data = await async_db_client.get_session(request.session_id)
             if session_data:
                 query += f"\n\nSession: {session_data.get('session', '')}"
         try:
-            async with httpx.AsyncClient(timeout=300.0) as client:
-                async with client.stream(
-                    "POST", 
-                    f"{AGENTS_BASE}/agents/assistant", 
-                    json={"query": query, "thread_id": conversation_id},
-                    headers={"Accept": "text/event-stream"}
-                ) as response:
-                    if response.is_error:
-                        yield f"data: {json.dumps({'status': 'error', 'step': 'connection', 'message': 'Failed to connect to agents service'})}\n\n"
-                        return
+            client = agents_client.client
+            async with client.stream(
+                "POST", 
+                "/agents/assistant", 
+                json={"query": query, "thread_id": conversation_id},
+                headers={"Accept": "text/event-stream"}
+            ) as response:
+                if response.is_error:
+                    yield f"data: {json.dumps({'status': 'error', 'step': 'connection', 'message': 'Failed to connect to agents service'})}\n\n"
+                    return
                     
-                    assistant_response = ""
-                    async for line in response.aiter_lines():
-                        if line:
-                            yield f"{line}\n"
+                assistant_response = ""
+                async for line in response.aiter_lines():
+                    if line:
+                        yield f"{line}\n"
                             
-                            if line.startswith("data: "):
-                                try:
-                                    event_data = json.loads(line[6:])
-                                    if event_data.get("status") == "assistant_response":
-                                        assistant_response = event_data.get("data", "")
-                                except json.JSONDecodeError:
-                                    pass
+                        if line.startswith("data: "):
+                            try:
+                                event_data = json.loads(line[6:])
+                                if event_data.get("status") == "assistant_response":
+                                    assistant_response = event_data.get("data", "")
+                            except json.JSONDecodeError:
+                                pass
                     
-                    # Save the conversation to history
-                    if assistant_response and conversation_id:
-                        # Get existing conversation or create new one
-                        conversation_data = db_client.get_assistant_conversation(conversation_id)
-                        if conversation_data:
-                            # Update existing conversation
-                            conversation = AssistantConversation(**conversation_data)
-                            conversation.messages.append(AssistantMessage(
-                                role="user",
-                                content=request.user_question,
-                                timestamp=datetime.datetime.utcnow()
-                            ))
-                            conversation.messages.append(AssistantMessage(
-                                role="assistant",
-                                content=assistant_response,
-                                timestamp=datetime.datetime.utcnow()
-                            ))
-                            conversation.updated_at = datetime.datetime.utcnow()
-                            db_client.update_assistant_conversation(conversation_id, conversation)
-                        else:
-                            # Create new conversation
-                            conversation = AssistantConversation(
-                                id=conversation_id,
-                                user_id=request.user_id,
-                                question_id=request.question_id,
-                                session_id=request.session_id,
-                                messages=[
-                                    AssistantMessage(
-                                        role="user",
-                                        content=request.user_question,
-                                        timestamp=datetime.datetime.utcnow()
-                                    ),
-                                    AssistantMessage(
-                                        role="assistant",
-                                        content=assistant_response,
-                                        timestamp=datetime.datetime.utcnow()
-                                    )
-                                ],
-                                created_at=datetime.datetime.utcnow(),
-                                updated_at=datetime.datetime.utcnow()
-                            )
-                            db_client.add_assistant_conversation(conversation)
+                # Save the conversation to history
+                if assistant_response and conversation_id:
+                    now = datetime.datetime.utcnow()
+                    turn = [
+                        AssistantMessage(
+                            role="user",
+                            content=request.user_question,
+                            timestamp=now
+                        ),
+                        AssistantMessage(
+                            role="assistant",
+                            content=assistant_response,
+                            timestamp=now
+                        )
+                    ]
                         
-                        yield f"data: {json.dumps({'status': 'final', 'step': 'assistant', 'message': 'Assistant response completed', 'conversation_id': conversation_id})}\n\n"
+                    if await async_db_client.get_assistant_conversation(conversation_id):
+                        # Append the turn to the existing conversation log
+                        await async_db_client.append_assistant_messages(conversation_id, turn, now)
                     else:
-                        yield f"data: {json.dumps({'status': 'final', 'step': 'assistant', 'message': 'Assistant response completed'})}\n\n"
+                        # Create new conversation
+                        conversation = AssistantConversation(
+                            id=conversation_id,
+                            user_id=request.user_id,
+                            question_id=request.question_id,
+                            session_id=request.session_id,
+                            messages=turn,
+                            created_at=now,
+                            updated_at=now
+                        )
+                        await async_db_client.add_assistant_conversation(conversation)
+                        
+                    yield f"data: {json.dumps({'status': 'final', 'step': 'assistant', 'message': 'Assistant response completed', 'conversation_id': conversation_id})}\n\n"
+                else:
+                    yield f"data: {json.dumps({'status': 'final', 'step': 'assistant', 'message': 'Assistant response completed'})}\n\n"
                             
         except Exception as e:
             yield f"data: {json.dumps({'status': 'error', 'step': 'assistant', 'message': 'Assistant step failed', 'error': str(e)})}\n\n"
@@ -126,17 +113,37 @@ async def assistant(request: AssistantRequest):
 
 
 @router.get("/{conversation_id}")
-async def get_conversation_messages(conversation_id: str):
-    conversation_data = db_client.get_assistant_conversation(conversation_id)
+async def get_conversation_messages(
+    conversation_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[int] = Query(None, ge=0),
+    fields: Optional[str] = None
+):
+    """
+    Returns the most recent `limit` messages. Pass the returned `next_before`
+    as `before` to page further back through the history, and a comma separated
+    `fields` list (e.g. "role,content") to trim each message.
+    """
+    conversation_data = await async_db_client.get_assistant_conversation(conversation_id)
     if not conversation_data:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
+    messages = await async_db_client.get_assistant_messages(
+        conversation_id,
+        limit=limit,
+        before=before,
+        fields=parse_fields(fields)
+    )
+    first_seq = messages[0]["seq"] if messages else 0
+    
     return {
         "conversation_id": conversation_id,
-        "messages": conversation_data.get("messages", []),
+        "messages": messages,
+        "message_count": conversation_data.get("message_count", len(conversation_data.get("messages", []))),
+        "next_before": first_seq if first_seq > 0 else None,
         "created_at": conversation_data.get("created_at"),
         "updated_at": conversation_data.get("updated_at"),
         "user_id": conversation_data.get("user_id"),
         "question_id": conversation_data.get("question_id"),
         "session_id": conversation_data.get("session_id")
-    }
\ No newline at end of file
+    }
@@ -1,81 +1,20 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
-from ..database.chromadb_client import db_client
-from ..services.auto_grader import AutoGrader
+from ..database.async_client import async_db_client
+from ..services.agents_client import agents_client
+from ..services.grade_cache import answer_hash
+from ..services.grading import (
+    FR_GRADING_CONCURRENCY,
+    auto_grade_cached,
+    grade_session_question,
+    grader_version,
+)
 from ..models.question import AutoGradeRequest, AutoGradeResponse, GradeRequest, GradeResponse, TestResult
-import httpx
-import os
+import asyncio
 import json
-from dotenv import load_dotenv
-
-load_dotenv()
-
-AGENTS_BASE = os.getenv("AGENTS_BASE_URL")
-if not AGENTS_BASE:
-    raise ValueError("AGENTS_BASE_URL is not set")
 
 router = APIRouter(prefix="/grade", tags=["grade"])
 
-async def grade_free_response_question(question_data: dict, student_answer) -> dict:
-    """
-    Grade a single free response question using the agent grader
-    Returns a dict with grading results
-    """
-    try:
-        # Create a GradeRequest for the agent grader
-        from ..models.question import AgentGeneratedQuestion
-        
-        # Reconstruct the question object
-        question_obj = AgentGeneratedQuestion(**question_data)
-        
-        request = GradeRequest(
-            question=question_obj,
-            student_answer=student_answer
-        )
-        
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            response = await client.post(
-                f"{AGENTS_BASE}/agents/grade",
-                json=request.model_dump(),
-                headers={"Accept": "application/json"}
-            )
-            
-            if response.is_error:
-                return {
-                    "success": False,
-                    "error": "Failed to connect to agents service",
-                    "points_earned": 0,
-                    "explanation": "Failed to grade free response question"
-                }
-            
-            # Parse the response
-            result = response.json()
-            
-            # Extract grading information from the response
-            if "data" in result and "grade" in result["data"]:
-                grade_info = result["data"]["grade"]
-                return {
-                    "success": True,
-                    "points_earned": grade_info.get("score", 0),
-                    "explanation": grade_info.get("explanation", "Free response graded"),
-                    "is_correct": grade_info.get("score", 0) > 0
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": "Invalid response from agent grader",
-                    "points_earned": 0,
-                    "explanation": "Failed to parse grading response"
-                }
-                
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e),
-            "points_earned": 0,
-            "explanation": f"Error grading free response: {str(e)}"
-        }
-
 async def stream_grade_execution(request: GradeRequest):
     """
     Stream the grading execution with real-time updates
@@ -88,20 +27,20 @@ async def stream_grade_execution(request: GradeRequest):
                 yield f"data: {json.dumps({'status': 'error', 'step': 'grade', 'message': 'Question is not a free response question', 'error': 'Only free response questions can be graded with this endpoint'})}\n\n"
                 return
             
-            async with httpx.AsyncClient(timeout=300.0) as client:
-                async with client.stream(
-                    "POST", 
-                    f"{AGENTS_BASE}/agents/grade", 
-                    json=request.model_dump(),
-                    headers={"Accept": "text/event-stream"}
-                ) as response:
-                    if response.is_error:
-                        yield f"data: {json.dumps({'status': 'error', 'step': 'connection', 'message': 'Failed to connect to agents service'})}\n\n"
-                        return
+            client = agents_client.client
+            async with client.stream(
+                "POST", 
+                "/agents/grade", 
+                json=request.model_dump(),
+                headers={"Accept": "text/event-stream"}
+            ) as response:
+                if response.is_error:
+                    yield f"data: {json.dumps({'status': 'error', 'step': 'connection', 'message': 'Failed to connect to agents service'})}\n\n"
+                    return
                     
-                    async for line in response.aiter_lines():
-                        if line:
-                            yield f"{line}\n"
+                async for line in response.aiter_lines():
+                    if line:
+                        yield f"{line}\n"
                             
         except Exception as e:
             yield f"data: {json.dumps({'status': 'error', 'step': 'grade', 'message': 'Grading step failed', 'error': str(e)})}\n\n"
@@ -110,100 +49,41 @@ async def stream_grade_execution(request: GradeRequest):
     except Exception as e:
         yield f"data: {json.dumps({'status': 'error', 'step': 'pipeline', 'message': 'Grading pipeline failed', 'error': str(e)})}\n\n"
 
-@router.post("/session/{session_id}", response_model=TestResult)
-async def grade_session(session_id: str):
-    """
-    Grade all questions in a session and return a TestResult
-    """
+async def load_session_questions(session_id: str) -> list:
     # Get session data
-    session_data = db_client.get_session(session_id)
+    session_data = await async_db_client.get_session(session_id)
     if not session_data:
         raise HTTPException(status_code=404, detail="Session not found")
     
     # Get all questions for this session
-    questions = db_client.get_questions_by_session(session_id)
+    questions = await async_db_client.get_questions_by_session(session_id)
     if not questions:
         raise HTTPException(status_code=404, detail="No questions found for this session")
-    
-    total_points = 0
-    points_earned = 0
-    graded_questions = []
-    
-    # Process each question
-    for question_data in questions:
-        question_type = question_data["question"]["data"]["type"]
-        question_points = question_data.get("points", 1)
-        total_points += question_points
-        
-        # Check if student has answered
-        student_answer = question_data.get("student_answer")
-        if not student_answer:
-            # No answer provided, 0 points
-            points_earned += 0
-            graded_questions.append({
-                "question_id": question_data["id"],
-                "type": question_type,
-                "points": question_points,
-                "points_earned": 0,
-                "is_correct": False,
-                "explanation": "No answer provided"
-            })
-            continue
-        
-        # Grade based on question type
-        if question_type == "fr":
-            # Free response questions use agent grader
-            fr_result = await grade_free_response_question(
-                question_data["question"]["data"], 
-                student_answer
-            )
-            
-            # Calculate points earned for this question
-            question_points_earned = int(fr_result["points_earned"] * question_points)
-            points_earned += question_points_earned
-            
-            # Update question completion in database
-            db_client.update_question_completion(
-                question_data["id"], 
-                True, 
-                question_points_earned
-            )
-            
-            graded_questions.append({
-                "question_id": question_data["id"],
-                "type": question_type,
-                "points": question_points,
-                "points_earned": question_points_earned,
-                "is_correct": fr_result["is_correct"],
-                "explanation": fr_result["explanation"]
-            })
-        else:
-            # Auto-grade other question types
-            grade_result = AutoGrader.grade_question(
-                question_data["question"]["data"], 
-                student_answer
-            )
-            
-            # Calculate points earned for this question
-            question_points_earned = int(grade_result.points_earned * question_points)
-            points_earned += question_points_earned
-            
-            # Update question completion in database
-            db_client.update_question_completion(
-                question_data["id"], 
-                True, 
-                question_points_earned
-            )
-            
-            graded_questions.append({
-                "question_id": question_data["id"],
-                "type": question_type,
-                "points": question_points,
-                "points_earned": question_points_earned,
-                "is_correct": grade_result.is_correct,
-                "explanation": grade_result.explanation
-            })
-    
+    return questions
+
+async def finalize_session_grading(session_id: str, graded_questions: list) -> TestResult:
+    """
+    Score the graded questions, save every grade and the final score, and
+    build the TestResult
+    """
+    total_points = sum(q["points"] for q in graded_questions)
+    points_earned = round(sum(q["points_earned"] for q in graded_questions), 2)
+    # Only questions graded this time are written, all in one flush
+    regraded = [q for q in graded_questions if q["answered"] and not q["reused"]]
+    states = {
+        q["question_id"]: {
+            "is_completed": True,
+            "points_earned": q["points_earned"],
+            "is_correct": q["is_correct"],
+            "graded_answer_hash": q["graded_answer_hash"],
+            "grader_version": q["grader_version"],
+        }
+        for q in regraded
+    }
+    for q in graded_questions:
+        if q["reused"] and not q["is_completed"]:
+            # Speculatively graded on save; submitting completes it
+            states[q["question_id"]] = {"is_completed": True}
     
     # Calculate percentage
     percentage = (points_earned / total_points * 100) if total_points > 0 else 0
@@ -213,7 +93,7 @@ async def grade_session(session_id: str):
     total_questions = len(graded_questions)
     
     summary = f"Completed {total_questions} questions with {correct_count} correct answers. "
-    summary += f"Scored {points_earned}/{total_points} points ({percentage:.1f}%)."
+    summary += f"Scored {points_earned:g}/{total_points} points ({percentage:.1f}%)."
     
     # Generate improvement suggestions
     improvements = []
@@ -238,20 +118,85 @@ async def grade_session(session_id: str):
             if type_percentage < 60:
                 improvements.append(f"Focus on improving {q_type} questions (scored {type_percentage:.1f}%)")
     
-    # Update session with final score
-    db_client.update_session_status(session_id, "completed", percentage)
+    # Save all question grades and the final score in one write
+    await async_db_client.save_session_grades(session_id, states, "completed", percentage)
     
     return TestResult(
         percentage=percentage,
         total_points=total_points,
         points_earned=points_earned,
         summary=summary,
-        improvements=improvements
+        improvements=improvements,
+        regraded=len(regraded),
+        reused=sum(1 for q in graded_questions if q["reused"])
+    )
+
+@router.post("/session/{session_id}", response_model=TestResult)
+async def grade_session(session_id: str):
+    """
+    Grade all questions in a session and return a TestResult
+    """
+    questions = await load_session_questions(session_id)
+    
+    fr_semaphore = asyncio.Semaphore(FR_GRADING_CONCURRENCY)
+    # Grade every question at once; FR calls are capped by the semaphore and
+    # auto-graded ones run in worker threads alongside them
+    graded_questions = await asyncio.gather(*(
+        grade_session_question(question_data, fr_semaphore) for question_data in questions
+    ))
+    
+    return await finalize_session_grading(session_id, graded_questions)
+
+async def stream_session_grading(session_id: str, questions: list):
+    """
+    Stream each question's grade as soon as it is ready, then the TestResult
+    """
+    try:
+        yield f"data: {json.dumps({'status': 'started', 'step': 'grade', 'message': f'Grading {len(questions)} questions...'})}\n\n"
+        
+        fr_semaphore = asyncio.Semaphore(FR_GRADING_CONCURRENCY)
+        
+        async def grade_indexed(index: int, question_data: dict):
+            return index, await grade_session_question(question_data, fr_semaphore)
+        
+        tasks = [
+            asyncio.create_task(grade_indexed(index, question_data))
+            for index, question_data in enumerate(questions)
+        ]
+        graded_questions = [None] * len(questions)
+        try:
+            for completed, next_result in enumerate(asyncio.as_completed(tasks), 1):
+                index, graded = await next_result
+                graded_questions[index] = graded
+                yield f"data: {json.dumps({'status': 'question_graded', 'step': 'grade', 'message': f'Graded {completed}/{len(questions)} questions', 'data': graded})}\n\n"
+        finally:
+            # Client went away or grading failed: don't leave FR calls running
+            for task in tasks:
+                task.cancel()
+        
+        test_result = await finalize_session_grading(session_id, graded_questions)
+        yield f"data: {json.dumps({'status': 'completed', 'step': 'grade', 'message': 'Session graded', 'data': test_result.model_dump()})}\n\n"
+    except Exception as e:
+        yield f"data: {json.dumps({'status': 'error', 'step': 'grade', 'message': 'Session grading failed', 'error': str(e)})}\n\n"
+
+@router.post("/session/{session_id}/stream")
+async def grade_session_stream(session_id: str):
+    questions = await load_session_questions(session_id)
+    
+    return StreamingResponse(
+        stream_session_grading(session_id, questions),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Headers": "*",
+        }
     )
 
 @router.post("/question/{question_id}", response_model=AutoGradeResponse)
 async def grade_question(question_id: str):
-    question_data = db_client.get_question(question_id)
+    question_data = await async_db_client.get_question(question_id)
     if not question_data:
         raise HTTPException(status_code=404, detail="Question not found")
     
@@ -271,14 +216,25 @@ async def grade_question(question_id: str):
         )
 
     # Grade the question
-    grade_result = AutoGrader.grade_question(question_data["question"]["data"], student_answer)
+    grade_result = await asyncio.to_thread(
+        auto_grade_cached,
+        question_id,
+        question_data["question"]["data"],
+        student_answer
+    )
     
-    # Update question completion status in database
-    points_earned = int(grade_result.points_earned * question_data["points"])
-    db_client.update_question_completion(
-        question_id, 
-        True, 
-        points_earned
+    # Update question completion status in database, recording which answer
+    # was graded so a later session grade can reuse it
+    question_type = question_data["question"]["data"]["type"]
+    version = grader_version(question_type)
+    points_earned = round(grade_result.points_earned * question_data["points"], 2)
+    await async_db_client.update_question_state(
+        question_id,
+        is_completed=True,
+        points_earned=points_earned,
+        is_correct=grade_result.is_correct,
+        graded_answer_hash=answer_hash(question_type, student_answer, version),
+        grader_version=version
     )
     
     return grade_result
@@ -287,7 +243,7 @@ async def grade_question(question_id: str):
 async def grade_free_response(question_id: str):
     try:
         # Fetch question from database
-        question_data = db_client.get_question(question_id)
+        question_data = await async_db_client.get_question(question_id)
         if not question_data:
             raise HTTPException(status_code=404, detail="Question not found")
         
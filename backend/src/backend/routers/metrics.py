@@ -0,0 +1,28 @@
+import asyncio
+from fastapi import APIRouter
+from ..database.async_client import async_db_client
+from ..services.agents_client import agents_client
+from ..services.answer_key import answer_keys
+from ..services.background_grader import background_grader
+from ..services.grade_cache import grade_cache
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@router.get("/storage")
+async def storage_metrics():
+    return {
+        "latency": async_db_client.latency_stats(),
+        "cache": await async_db_client.cache_stats(),
+    }
+
+@router.get("/agents-http")
+async def agents_http_metrics():
+    return agents_client.pool_stats()
+
+@router.get("/grading")
+async def grading_metrics():
+    return {
+        "answer_keys": answer_keys.stats(),
+        "grade_cache": await asyncio.to_thread(grade_cache.stats),
+        "background": background_grader.stats(),
+    }
@@ -1,18 +1,22 @@
 from fastapi import APIRouter, HTTPException
 
 from backend.models.question import StudentAnswer
-from ..database.chromadb_client import db_client
+from ..database.async_client import async_db_client
+from ..services.background_grader import background_grader
 
 router = APIRouter(prefix="/questions", tags=["questions"])
 
 @router.get("/{question_id}")
 async def get_question(question_id: str):
-    question_data = db_client.get_question(question_id)
+    question_data = await async_db_client.get_question(question_id)
     if not question_data:
         raise HTTPException(status_code=404, detail="Question not found")
     return question_data
 
 @router.post("/{question_id}/save-answer")
 async def save_answer(question_id: str, answer: StudentAnswer):
-    db_client.update_question_answer(question_id, answer.answer)
+    if not await async_db_client.update_question_answer(question_id, answer.answer):
+        raise HTTPException(status_code=404, detail="Question not found")
+    # No-op unless SPECULATIVE_GRADING is on
+    background_grader.submit(question_id)
     return {"message": "Answer saved successfully"}
\ No newline at end of file
@@ -1,12 +1,15 @@
 import uuid
 import datetime
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Query
 from fastapi.responses import StreamingResponse
 from ..models.session import Session
 from ..models.search import SearchRequest
 from ..models.question import AgentGeneratedQuestion, Question
-from ..database.chromadb_client import db_client
-import httpx
+from ..database.async_client import async_db_client
+from ..services.agents_client import agents_client
+from ..services.answer_key import answer_keys
+from ..database.projection import parse_fields
 import os
 import json
 from dotenv import load_dotenv
@@ -15,37 +18,33 @@ load_dotenv()
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
-AGENTS_BASE = os.getenv("AGENTS_BASE_URL")
-if not AGENTS_BASE:
-    raise ValueError("AGENTS_BASE_URL is not set")
-
 async def stream_agent_pipeline(req: SearchRequest):
     questions = []
     
-    async with httpx.AsyncClient(timeout=300.0) as client:
-        async with client.stream(
-            "POST", 
-            f"{AGENTS_BASE}/agents/search", 
-            json=req.model_dump(),
-            headers={"Accept": "text/event-stream"}
-        ) as response:
-            if response.is_error:
-                yield f"data: {json.dumps({'status': 'error', 'step': 'connection', 'message': 'Failed to connect to agents service'})}\n\n"
-                return
+    client = agents_client.client
+    async with client.stream(
+        "POST", 
+        "/agents/search", 
+        json=req.model_dump(),
+        headers={"Accept": "text/event-stream"}
+    ) as response:
+        if response.is_error:
+            yield f"data: {json.dumps({'status': 'error', 'step': 'connection', 'message': 'Failed to connect to agents service'})}\n\n"
+            return
             
-            async for line in response.aiter_lines():
-                if line:
-                    yield f"{line}\n"
+        async for line in response.aiter_lines():
+            if line:
+                yield f"{line}\n"
                     
-                    if line.startswith("data: "):
-                        try:
-                            event_data = json.loads(line[6:])
-                            if event_data.get("status") == "question":
-                                question_dict = event_data.get("data")
-                                if question_dict:
-                                    questions.append(question_dict)
-                        except json.JSONDecodeError:
-                            pass
+                if line.startswith("data: "):
+                    try:
+                        event_data = json.loads(line[6:])
+                        if event_data.get("status") == "question":
+                            question_dict = event_data.get("data")
+                            if question_dict:
+                                questions.append(question_dict)
+                    except json.JSONDecodeError:
+                        pass
     
     question_list = []
 
@@ -73,11 +72,13 @@ async def stream_agent_pipeline(req: SearchRequest):
         mode=req.mode,
     )
     
-    db_client.add_session(session)
-    db_client.add_questions_batch(question_list, session_id=session.id)
+    await async_db_client.add_session(session)
+    await async_db_client.add_questions_batch(question_list, session_id=session.id)
+    # Compile answer keys now so the first grade of this session skips it
+    answer_keys.prime([(question.id, question.question.data.model_dump()) for question in question_list])
     
     if req.user_id:
-        db_client.update_user_sessions(req.user_id, session.id)
+        await async_db_client.update_user_sessions(req.user_id, session.id)
 
     yield f"data: {json.dumps({'status': 'final', 'step': 'session', 'message': 'Session created', 'session_id': session.id})}\n\n"
 
@@ -95,16 +96,33 @@ async def create_session(req: SearchRequest):
 
 @router.get("/{session_id}")
 async def get_session(session_id: str):
-    session_data = db_client.get_session(session_id)
+    session_data = await async_db_client.get_session(session_id)
     if not session_data:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Session not found")
     return session_data
 
 @router.get("/{session_id}/questions")
-async def get_session_questions(session_id: str):
-    questions = db_client.get_questions_by_session(session_id)
-    if not questions:
+async def get_session_questions(
+    session_id: str,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    fields: Optional[str] = None
+):
+    """
+    `offset`/`limit` page through the session's questions; `next_offset` is the
+    cursor for the following page. `fields` is a comma separated list of dotted
+    paths to return, e.g. "id,question.text,question.data.type".
+    """
+    questions = await async_db_client.get_questions_by_session(
+        session_id,
+        offset=offset,
+        limit=limit,
+        fields=parse_fields(fields)
+    )
+    if not questions and offset == 0:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="No questions found for this session")
-    return {"questions": questions, "count": len(questions)}
\ No newline at end of file
+    
+    next_offset = offset + len(questions) if limit is not None and len(questions) == limit else None
+    return {"questions": questions, "count": len(questions), "next_offset": next_offset}
\ No newline at end of file
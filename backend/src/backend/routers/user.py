@@ -4,7 +4,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
 from typing import List
 from ..models.user import User
-from ..database.chromadb_client import db_client
+from ..database.async_client import async_db_client
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -29,7 +29,7 @@ class LoginResponse(BaseModel):
 
 @router.post("/create", response_model=UserResponse)
 async def create_user(req: CreateUserRequest):
-    existing_user = db_client.get_user_by_email(req.email)
+    existing_user = await async_db_client.get_user_by_email(req.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="User with this email already exists")
     
@@ -41,7 +41,7 @@ async def create_user(req: CreateUserRequest):
         created_at=datetime.utcnow()
     )
     
-    db_client.add_user(user)
+    await async_db_client.add_user(user)
     
     return UserResponse(
         id=user.id,
@@ -52,7 +52,7 @@ async def create_user(req: CreateUserRequest):
 
 @router.post("/login", response_model=LoginResponse)
 async def login_user(req: LoginRequest):
-    user_data = db_client.get_user_by_email(req.email)
+    user_data = await async_db_client.get_user_by_email(req.email)
     
     if not user_data:
         raise HTTPException(status_code=401, detail="Invalid email or password")
@@ -68,7 +68,7 @@ async def login_user(req: LoginRequest):
 
 @router.get("/{user_id}/sessions", response_model=List[str])
 async def get_user_sessions(user_id: str):
-    user_data = db_client.get_user(user_id)
+    user_data = await async_db_client.get_user(user_id)
     
     if not user_data:
         raise HTTPException(status_code=404, detail="User not found")
@@ -77,7 +77,7 @@ async def get_user_sessions(user_id: str):
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(user_id: str):
-    user_data = db_client.get_user(user_id)
+    user_data = await async_db_client.get_user(user_id)
     
     if not user_data:
         raise HTTPException(status_code=404, detail="User not found")
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from backend.routers.session import router as session_router
@@ -5,8 +6,31 @@ from backend.routers.question import router as question_router
 from backend.routers.grade import router as grade_router
 from backend.routers.user import router as user_router
 from backend.routers.assistant import router as assistant_router
+from backend.routers.metrics import router as metrics_router
+from backend.database.storage import db_client
+from backend.services.agents_client import agents_client
+from backend.services.answer_key import answer_keys
+from backend.services.background_grader import background_grader
+from backend.services.grade_cache import grade_cache
 
-app = FastAPI(title="Platypus API Service", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compiled answer keys and cached grades go stale when a question is rewritten
+    db_client.add_question_listener(answer_keys.invalidate)
+    db_client.add_question_listener(grade_cache.invalidate_question)
+    grade_cache.open()
+    await agents_client.start()
+    await background_grader.start()
+    try:
+        yield
+    finally:
+        await background_grader.stop()
+        await agents_client.close()
+        grade_cache.close()
+        db_client.remove_question_listener(answer_keys.invalidate)
+        db_client.remove_question_listener(grade_cache.invalidate_question)
+
+app = FastAPI(title="Platypus API Service", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,4 +45,5 @@ app.include_router(session_router)
 app.include_router(question_router)
 app.include_router(grade_router)
 app.include_router(user_router)
-app.include_router(assistant_router)
\ No newline at end of file
+app.include_router(assistant_router)
+app.include_router(metrics_router)
\ No newline at end of file
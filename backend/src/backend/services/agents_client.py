@@ -0,0 +1,163 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+import httpx
+from dotenv import load_dotenv
+from ..metrics import LatencyHistogram
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+AGENTS_BASE = os.getenv("AGENTS_BASE_URL")
+if not AGENTS_BASE:
+    raise ValueError("AGENTS_BASE_URL is not set")
+
+class PooledTransport(httpx.AsyncHTTPTransport):
+    """
+    Transport that records how long requests wait for a pooled connection.
+    The wait ends at the first connection-level trace event: either a new
+    connection starting to connect or a reused one sending request headers.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.pool_wait = LatencyHistogram()
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        submitted_at = time.perf_counter()
+        waiting = True
+        parent_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            nonlocal waiting
+            if waiting:
+                waiting = False
+                self.pool_wait.record(time.perf_counter() - submitted_at)
+            if parent_trace is not None:
+                await parent_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        with self._lock:
+            self.in_flight += 1
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            with self._lock:
+                self.in_flight -= 1
+            raise
+
+        # The connection stays checked out until the body is read or closed
+        original_aclose = response.stream.aclose
+
+        async def aclose() -> None:
+            try:
+                await original_aclose()
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+
+        response.stream.aclose = aclose
+        return response
+
+    def pool_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "in_flight_requests": self.in_flight,
+            "pool_wait": self.pool_wait.snapshot(),
+        }
+        # Connection counts come from httpcore's pool, which isn't public API;
+        # leave them out if its shape changes
+        try:
+            connections = list(self._pool.connections)
+            idle = sum(1 for connection in connections if connection.is_idle())
+        except AttributeError:
+            return stats
+        stats.update({
+            "connections": len(connections),
+            "active_connections": len(connections) - idle,
+            "idle_connections": idle,
+        })
+        return stats
+
+class AgentsClient:
+    """
+    One pooled httpx.AsyncClient for all calls to the agents service, opened
+    and closed by the app lifespan. Connections are kept alive between
+    requests, so session creation, grading and chat don't each pay a fresh
+    TCP/TLS handshake.
+    """
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 300.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        pool_timeout: float = 30.0,
+        http2: bool = False
+    ):
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(timeout, pool=pool_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2
+        self._transport: Optional[PooledTransport] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("AGENTS_HTTP2 is set but the h2 package is not installed, falling back to HTTP/1.1")
+                http2 = False
+        self.http2 = http2
+
+        self._transport = PooledTransport(limits=self.limits, http2=http2)
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            transport=self._transport
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._transport = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("Agents client is not started; it is opened by the app lifespan")
+        return self._client
+
+    def pool_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+        }
+        if self._transport is not None:
+            stats.update(self._transport.pool_stats())
+        return stats
+
+agents_client = AgentsClient(
+    AGENTS_BASE,
+    timeout=float(os.getenv("AGENTS_HTTP_TIMEOUT_SECONDS", "300")),
+    max_connections=int(os.getenv("AGENTS_HTTP_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("AGENTS_HTTP_MAX_KEEPALIVE", "20")),
+    keepalive_expiry=float(os.getenv("AGENTS_HTTP_KEEPALIVE_EXPIRY_SECONDS", "30")),
+    pool_timeout=float(os.getenv("AGENTS_HTTP_POOL_TIMEOUT_SECONDS", "30")),
+    http2=os.getenv("AGENTS_HTTP2", "false").lower() in ("1", "true", "yes")
+)
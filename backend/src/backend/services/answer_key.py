@@ -0,0 +1,71 @@
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from ..database.cache import LRUCache
+
+class AnswerKey:
+    """
+    A question's answer preprocessed once for grading: normalized strings,
+    the numeric value with its tolerance, the boolean, and matching pairs in
+    list, set and dict form. Treat as read-only; keys are shared through the cache.
+    """
+    __slots__ = ("type", "answer", "correct_answer", "normalized", "number", "tolerance",
+                 "boolean", "pairs", "pair_set", "pair_map", "order")
+
+    def __init__(self, question_data: dict):
+        self.type: str = question_data["type"]
+        self.answer: Any = question_data.get("answer")
+        # The string shown as AutoGradeResponse.correct_answer
+        self.correct_answer: str = self.answer if isinstance(self.answer, str) else str(self.answer)
+        self.normalized: Optional[str] = None
+        self.number: Optional[float] = None
+        self.tolerance: Optional[float] = None
+        self.boolean: Optional[bool] = None
+        self.pairs: Optional[List] = None
+        self.pair_set: Optional[frozenset] = None
+        self.pair_map: Optional[Dict[str, str]] = None
+        self.order: Optional[List[str]] = None
+
+        match self.type:
+            case "mcq" | "fib" | "short_answer":
+                self.normalized = self.answer.strip().lower()
+            case "numeric":
+                self.number = self.answer
+                self.tolerance = abs(self.answer) * 0.01
+            case "tf":
+                self.boolean = self.answer
+            case "matching":
+                self.pairs = list(self.answer)
+                pair_tuples = [(str(left), str(right)) for left, right in self.answer]
+                self.pair_set = frozenset(pair_tuples)
+                self.pair_map = dict(pair_tuples)
+            case "ordering":
+                self.order = list(self.answer)
+
+def compile_answer_key(question_data: dict) -> AnswerKey:
+    return AnswerKey(question_data)
+
+class AnswerKeyCache:
+    """Compiled answer keys by question id, built on store or on first grade"""
+    def __init__(self, maxsize: int = 10000):
+        self._cache = LRUCache(maxsize=maxsize, ttl=None)
+
+    def get(self, question_id: str, question_data: dict) -> AnswerKey:
+        key = self._cache.get(question_id)
+        if key is None:
+            key = compile_answer_key(question_data)
+            self._cache.set(question_id, key)
+        return key
+
+    def prime(self, questions: List[Tuple[str, dict]]) -> None:
+        """Compile keys for (question_id, question data) pairs ahead of grading"""
+        for question_id, question_data in questions:
+            if question_data.get("type") != "fr":
+                self._cache.set(question_id, compile_answer_key(question_data))
+
+    def invalidate(self, question_id: str) -> None:
+        self._cache.invalidate(question_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+answer_keys = AnswerKeyCache(maxsize=int(os.getenv("ANSWER_KEY_CACHE_SIZE", "10000")))
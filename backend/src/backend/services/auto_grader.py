@@ -1,18 +1,76 @@
 import re
 import difflib
-from typing import Union, List, Tuple
+import numpy as np
+from typing import Any, Dict, Union, List, Optional, Tuple
 from ..models.question import (
     AutoGradeResponse
 )
+from .answer_key import AnswerKey, compile_answer_key
+from .similarity import similarity_at_least
+
+# Bump when a change alters grades; stored and cached grades made by another
+# version are re-graded
+GRADER_VERSION = "2"
+
+TRUE_VALUES = frozenset(['true', 't', 'yes', 'y', '1', 'correct'])
+FALSE_VALUES = frozenset(['false', 'f', 'no', 'n', '0', 'incorrect'])
+
+# Short answers pass at this SequenceMatcher ratio; failures longer than the
+# limit (both strings, in characters) don't report their exact similarity
+SHORT_ANSWER_CUTOFF = 0.7
+SHORT_ANSWER_EXPLAIN_LIMIT = 1000
+
+MATCHING_PAIR_PATTERN = re.compile(r'\(([^)]+)\)')
+
+class BatchGradeResult:
+    """
+    Columnar results of AutoGrader.grade_batch: one entry per answer, in
+    input order. Explanations and full AutoGradeResponse objects are only
+    built when asked for.
+    """
+    def __init__(
+        self,
+        questions: List[dict],
+        answer_keys: List[AnswerKey],
+        answers: List[Any],
+        is_correct: List[bool],
+        points_earned: List[float]
+    ):
+        self._questions = questions
+        self._answer_keys = answer_keys
+        self._answers = answers
+        self.is_correct = is_correct
+        self.points_earned = points_earned
+
+    def __len__(self) -> int:
+        return len(self.is_correct)
+
+    @property
+    def correct_count(self) -> int:
+        return sum(self.is_correct)
+
+    @property
+    def total_points(self) -> float:
+        return sum(self.points_earned)
+
+    def response(self, index: int) -> AutoGradeResponse:
+        return AutoGrader.grade_question(self._questions[index], self._answers[index], self._answer_keys[index])
+
+    def explanation(self, index: int) -> str:
+        return self.response(index).explanation
+
+    def to_dict(self) -> Dict[str, List]:
+        return {"is_correct": self.is_correct, "points_earned": self.points_earned}
 
 class AutoGrader:    
     @staticmethod
-    def grade_mcq(question_data: dict, student_answer: Union[str, bool, float, List[Tuple], List[str]]) -> AutoGradeResponse:
+    def grade_mcq(question_data: dict, student_answer: Union[str, bool, float, List[Tuple], List[str]], answer_key: Optional[AnswerKey] = None) -> AutoGradeResponse:
+        key = answer_key or compile_answer_key(question_data)
         student_answer_str = str(student_answer) if not isinstance(student_answer, str) else student_answer
-        is_correct = student_answer_str.strip().lower() == question_data["answer"].strip().lower()
+        is_correct = student_answer_str.strip().lower() == key.normalized
         points_earned = 1 if is_correct else 0
         
-        explanation = f"Correct answer: {question_data['answer']}"
+        explanation = f"Correct answer: {key.answer}"
         if not is_correct:
             explanation += f"\nYour answer: {student_answer_str}"
         
@@ -21,19 +79,20 @@ class AutoGrader:
             points_earned=points_earned,
             max_points=1,
             explanation=explanation,
-            correct_answer=question_data["answer"]
+            correct_answer=key.correct_answer
         )
     
     @staticmethod
-    def grade_tf(question_data: dict, student_answer: Union[str, bool, float, List[Tuple], List[str]]) -> AutoGradeResponse:
+    def grade_tf(question_data: dict, student_answer: Union[str, bool, float, List[Tuple], List[str]], answer_key: Optional[AnswerKey] = None) -> AutoGradeResponse:
+        key = answer_key or compile_answer_key(question_data)
         if isinstance(student_answer, bool):
             student_bool = student_answer
         else:
             student_bool = AutoGrader._parse_boolean(str(student_answer))
-        is_correct = student_bool == question_data["answer"]
+        is_correct = student_bool == key.boolean
         points_earned = 1 if is_correct else 0
         
-        explanation = f"Correct answer: {question_data['answer']}"
+        explanation = f"Correct answer: {key.answer}"
         if not is_correct:
             explanation += f"\nYour answer: {student_answer}"
         
@@ -42,19 +101,19 @@ class AutoGrader:
             points_earned=points_earned,
             max_points=1,
             explanation=explanation,
-            correct_answer=str(question_data["answer"])
+            correct_answer=key.correct_answer
         )
     
     @staticmethod
-    def grade_numeric(question_data: dict, student_answer: Union[str, bool, float, List[Tuple], List[str]]) -> AutoGradeResponse:
+    def grade_numeric(question_data: dict, student_answer: Union[str, bool, float, List[Tuple], List[str]], answer_key: Optional[AnswerKey] = None) -> AutoGradeResponse:
+        key = answer_key or compile_answer_key(question_data)
         try:
             if isinstance(student_answer, (int, float)):
                 student_num = float(student_answer)
             else:
                 student_num = float(str(student_answer).strip())
-            correct_num = question_data["answer"]
-            
-            tolerance = abs(correct_num) * 0.01
+            correct_num = key.number
+            tolerance = key.tolerance
             is_correct = abs(student_num - correct_num) <= tolerance
             
             points_earned = 1 if is_correct else 0
@@ -76,20 +135,21 @@ class AutoGrader:
                 is_correct=False,
                 points_earned=0,
                 max_points=1,
-                explanation=f"Invalid numeric format. Correct answer: {question_data['answer']}",
-                correct_answer=str(question_data["answer"])
+                explanation=f"Invalid numeric format. Correct answer: {key.answer}",
+                correct_answer=key.correct_answer
             )
     
     @staticmethod
-    def grade_fib(question_data: dict, student_answer: Union[str, bool, float, List[Tuple], List[str]]) -> AutoGradeResponse:
-        correct_answer = question_data["answer"].strip().lower()
+    def grade_fib(question_data: dict, student_answer: Union[str, bool, float, List[Tuple], List[str]], answer_key: Optional[AnswerKey] = None) -> AutoGradeResponse:
+        key = answer_key or compile_answer_key(question_data)
+        correct_answer = key.normalized
         student_answer_str = str(student_answer) if not isinstance(student_answer, str) else student_answer
         student_answer_clean = student_answer_str.strip().lower()
         
         is_correct = student_answer_clean == correct_answer
         points_earned = 1 if is_correct else 0
         
-        explanation = f"Correct answer: {question_data['answer']}"
+        explanation = f"Correct answer: {key.answer}"
         if not is_correct:
             explanation += f"\nYour answer: {student_answer_str}"
         
@@ -98,93 +158,90 @@ class AutoGrader:
             points_earned=points_earned,
             max_points=1,
             explanation=explanation,
-            correct_answer=question_data["answer"]
+            correct_answer=key.correct_answer
         )
     
     @staticmethod
-    def grade_short_answer(question_data: dict, student_answer: Union[str, bool, float, List[Tuple], List[str]]) -> AutoGradeResponse:
-        correct_answer = question_data["answer"].strip().lower()
+    def grade_short_answer(question_data: dict, student_answer: Union[str, bool, float, List[Tuple], List[str]], answer_key: Optional[AnswerKey] = None) -> AutoGradeResponse:
+        key = answer_key or compile_answer_key(question_data)
+        correct_answer = key.normalized
         student_answer_str = str(student_answer) if not isinstance(student_answer, str) else student_answer
         student_answer_clean = student_answer_str.strip().lower()
         
-        similarity = difflib.SequenceMatcher(None, correct_answer, student_answer_clean).ratio()
-        is_correct = similarity >= 0.7
+        is_correct = similarity_at_least(correct_answer, student_answer_clean, SHORT_ANSWER_CUTOFF)
         
         points_earned = 1 if is_correct else 0
         
-        explanation = f"Correct answer: {question_data['answer']}"
+        explanation = f"Correct answer: {key.answer}"
         if not is_correct:
             explanation += f"\nYour answer: {student_answer_str}"
-            explanation += f"\nSimilarity: {similarity:.2%}"
+            if len(correct_answer) + len(student_answer_clean) <= SHORT_ANSWER_EXPLAIN_LIMIT:
+                similarity = difflib.SequenceMatcher(None, correct_answer, student_answer_clean).ratio()
+                explanation += f"\nSimilarity: {similarity:.2%}"
+            else:
+                # Exact similarity of long answers costs more than grading them
+                explanation += f"\nSimilarity: below {SHORT_ANSWER_CUTOFF:.0%}"
         
         return AutoGradeResponse(
             is_correct=is_correct,
             points_earned=points_earned,
             max_points=1,
             explanation=explanation,
-            correct_answer=question_data["answer"]
+            correct_answer=key.correct_answer
         )
     
     @staticmethod
-    def grade_matching(question_data: dict, student_answer: Union[str, bool, float, List[Tuple], List[str]]) -> AutoGradeResponse:
+    def grade_matching(question_data: dict, student_answer: Union[str, bool, float, List[Tuple], List[str]], answer_key: Optional[AnswerKey] = None) -> AutoGradeResponse:
+        key = answer_key or compile_answer_key(question_data)
         try:
-            if isinstance(student_answer, list):
-                if len(student_answer) == 0:
-                    student_pairs = []
-                elif isinstance(student_answer[0], tuple):
-                    student_pairs = student_answer
-                else:
-                    student_pairs = AutoGrader._parse_matching_answer(str(student_answer))
-            else:
-                student_pairs = AutoGrader._parse_matching_answer(str(student_answer))
-            correct_pairs = question_data["answer"]
-            
-            if len(student_pairs) != len(correct_pairs):
-                return AutoGradeResponse(
-                    is_correct=False,
-                    points_earned=0,
-                    max_points=1,
-                    explanation=f"Number of pairs doesn't match. Expected {len(correct_pairs)}, got {len(student_pairs)}",
-                    correct_answer=str(correct_pairs)
-                )
-            
-            correct_count = 0
-            for student_pair, correct_pair in zip(student_pairs, correct_pairs):
-                if student_pair == correct_pair:
-                    correct_count += 1
-            
-            is_correct = correct_count == len(correct_pairs)
-            points_earned = correct_count / len(correct_pairs)
-            
-            explanation = f"Correct pairs: {correct_count}/{len(correct_pairs)}"
-            explanation += f"\nCorrect answer: {correct_pairs}"
-            if not is_correct:
-                explanation += f"\nYour answer: {student_pairs}"
-            
-            return AutoGradeResponse(
-                is_correct=is_correct,
-                points_earned=points_earned,
-                max_points=1,
-                explanation=explanation,
-                correct_answer=str(correct_pairs)
-            )
+            student_pairs = AutoGrader._matching_pairs(student_answer)
         except Exception as e:
             return AutoGradeResponse(
                 is_correct=False,
                 points_earned=0,
                 max_points=1,
                 explanation=f"Invalid format: {str(e)}. Expected format: (item1,item2),(item3,item4)",
-                correct_answer=str(question_data["answer"])
+                correct_answer=key.correct_answer
             )
+        
+        # Order doesn't matter: each left item is looked up in the key once,
+        # and only its first pairing in the answer counts
+        correct_count = 0
+        seen = set()
+        for left, right in student_pairs:
+            if left in seen:
+                continue
+            seen.add(left)
+            if key.pair_map.get(left) == right:
+                correct_count += 1
+        
+        total = len(key.pair_map)
+        is_correct = correct_count == total and len(student_pairs) == total
+        # Pairs for left items the key doesn't have count against the score
+        points_earned = correct_count / max(total, len(seen)) if total else 0
+        
+        explanation = f"Correct pairs: {correct_count}/{total}"
+        explanation += f"\nCorrect answer: {key.pairs}"
+        if not is_correct:
+            explanation += f"\nYour answer: {student_pairs}"
+        
+        return AutoGradeResponse(
+            is_correct=is_correct,
+            points_earned=points_earned,
+            max_points=1,
+            explanation=explanation,
+            correct_answer=key.correct_answer
+        )
     
     @staticmethod
-    def grade_ordering(question_data: dict, student_answer: Union[str, bool, float, List[Tuple], List[str]]) -> AutoGradeResponse:
+    def grade_ordering(question_data: dict, student_answer: Union[str, bool, float, List[Tuple], List[str]], answer_key: Optional[AnswerKey] = None) -> AutoGradeResponse:
+        key = answer_key or compile_answer_key(question_data)
         try:
             if isinstance(student_answer, list) and (len(student_answer) == 0 or isinstance(student_answer[0], str)):
                 student_order = student_answer
             else:
                 student_order = AutoGrader._parse_ordering_answer(str(student_answer))
-            correct_order = question_data["answer"]
+            correct_order = key.order
             
             if len(student_order) != len(correct_order):
                 return AutoGradeResponse(
@@ -215,11 +272,11 @@ class AutoGrader:
                 points_earned=0,
                 max_points=1,
                 explanation=f"Invalid format: {str(e)}. Expected format: item1,item2,item3",
-                correct_answer=str(question_data["answer"])
+                correct_answer=key.correct_answer
             )
     
     @staticmethod
-    def grade_question(question_data: dict, student_answer: Union[str, bool, float, List[Tuple], List[str]]) -> AutoGradeResponse:
+    def grade_question(question_data: dict, student_answer: Union[str, bool, float, List[Tuple], List[str]], answer_key: Optional[AnswerKey] = None) -> AutoGradeResponse:
         if student_answer is None:
             return AutoGradeResponse(
                 is_correct=False,
@@ -249,19 +306,19 @@ class AutoGrader:
         
         match question_data["type"]:
             case "mcq":
-                return AutoGrader.grade_mcq(question_data, student_answer)
+                return AutoGrader.grade_mcq(question_data, student_answer, answer_key)
             case "tf":
-                return AutoGrader.grade_tf(question_data, student_answer)
+                return AutoGrader.grade_tf(question_data, student_answer, answer_key)
             case "numeric":
-                return AutoGrader.grade_numeric(question_data, student_answer)
+                return AutoGrader.grade_numeric(question_data, student_answer, answer_key)
             case "fib":
-                return AutoGrader.grade_fib(question_data, student_answer)
+                return AutoGrader.grade_fib(question_data, student_answer, answer_key)
             case "short_answer":
-                return AutoGrader.grade_short_answer(question_data, student_answer)
+                return AutoGrader.grade_short_answer(question_data, student_answer, answer_key)
             case "matching":
-                return AutoGrader.grade_matching(question_data, student_answer)
+                return AutoGrader.grade_matching(question_data, student_answer, answer_key)
             case "ordering":
-                return AutoGrader.grade_ordering(question_data, student_answer)
+                return AutoGrader.grade_ordering(question_data, student_answer, answer_key)
             case _:
                 return AutoGradeResponse(
                     is_correct=False,
@@ -271,26 +328,151 @@ class AutoGrader:
                     correct_answer="Manual grading required"
                 )
     
+    @staticmethod
+    def grade_batch(questions: List[dict], answers: List[Any], answer_keys: Optional[List[AnswerKey]] = None) -> BatchGradeResult:
+        """
+        Grade many answers at once. questions[i] is the question data (the
+        `question.data` dict) that answers[i] answers; pass `answer_keys` from
+        the answer key cache to skip compiling them. Answers are grouped by
+        question type and each group is checked in one tight pass, without
+        building an AutoGradeResponse per answer; call `response(i)` or
+        `explanation(i)` on the result for the details of a single answer.
+        """
+        if len(questions) != len(answers):
+            raise ValueError(f"Got {len(questions)} questions but {len(answers)} answers")
+        if answer_keys is None:
+            answer_keys = AutoGrader._compile_keys(questions)
+
+        count = len(answers)
+        is_correct = [False] * count
+        points_earned = [0.0] * count
+
+        groups: Dict[str, List[int]] = {}
+        for i, answer in enumerate(answers):
+            if AutoGrader._is_blank(answer):
+                continue
+            groups.setdefault(answer_keys[i].type, []).append(i)
+
+        for question_type, indices in groups.items():
+            grade_group = BATCH_GRADERS.get(question_type)
+            if grade_group is None:
+                # Free response and unknown types are never auto-graded
+                continue
+            for i, correct, points in zip(indices, *grade_group(questions, answer_keys, answers, indices)):
+                is_correct[i] = correct
+                points_earned[i] = points
+
+        return BatchGradeResult(questions, answer_keys, answers, is_correct, points_earned)
+
+    @staticmethod
+    def _is_blank(answer: Any) -> bool:
+        if answer is None:
+            return True
+        if isinstance(answer, str):
+            return answer.strip() == ""
+        return isinstance(answer, list) and len(answer) == 0
+
+    @staticmethod
+    def _compile_keys(questions: List[dict]) -> List[AnswerKey]:
+        # Class-wide batches repeat the same question dict, so compile each once
+        compiled: Dict[int, AnswerKey] = {}
+        keys = []
+        for question_data in questions:
+            key = compiled.get(id(question_data))
+            if key is None:
+                key = compiled[id(question_data)] = compile_answer_key(question_data)
+            keys.append(key)
+        return keys
+
+    @staticmethod
+    def _batch_exact(questions: List[dict], keys: List[AnswerKey], answers: List[Any], indices: List[int]) -> Tuple[List[bool], List[float]]:
+        correct = [
+            (answers[i] if isinstance(answers[i], str) else str(answers[i])).strip().lower() == keys[i].normalized
+            for i in indices
+        ]
+        return correct, [1.0 if c else 0.0 for c in correct]
+
+    @staticmethod
+    def _batch_tf(questions: List[dict], keys: List[AnswerKey], answers: List[Any], indices: List[int]) -> Tuple[List[bool], List[float]]:
+        correct = []
+        for i in indices:
+            answer = answers[i]
+            if not isinstance(answer, bool):
+                answer_lower = str(answer).strip().lower()
+                # Unparseable answers are simply wrong here instead of raising
+                answer = True if answer_lower in TRUE_VALUES else False if answer_lower in FALSE_VALUES else None
+            correct.append(answer == keys[i].boolean)
+        return correct, [1.0 if c else 0.0 for c in correct]
+
+    @staticmethod
+    def _batch_numeric(questions: List[dict], keys: List[AnswerKey], answers: List[Any], indices: List[int]) -> Tuple[List[bool], List[float]]:
+        student_answers = [answers[i] for i in indices]
+        try:
+            # NumPy parses numbers and numeric strings in one C loop
+            student_nums = np.array(student_answers, dtype=float)
+        except (TypeError, ValueError):
+            student_nums = None
+        if student_nums is None or student_nums.shape != (len(indices),):
+            # Something didn't parse, or equal-length list answers made a 2-D
+            # array; unparseable answers become NaN, which never compares
+            # within tolerance
+            student_nums = np.array([AutoGrader._parse_number(answer) for answer in student_answers], dtype=float)
+        correct_nums = np.array([keys[i].number for i in indices], dtype=float)
+        tolerances = np.array([keys[i].tolerance for i in indices], dtype=float)
+        correct = np.abs(student_nums - correct_nums) <= tolerances
+        return correct.tolist(), correct.astype(float).tolist()
+
+    @staticmethod
+    def _parse_number(answer: Any) -> float:
+        try:
+            return float(answer) if isinstance(answer, (int, float)) else float(str(answer).strip())
+        except ValueError:
+            return float("nan")
+
+    @staticmethod
+    def _batch_short_answer(questions: List[dict], keys: List[AnswerKey], answers: List[Any], indices: List[int]) -> Tuple[List[bool], List[float]]:
+        correct = []
+        for i in indices:
+            answer = answers[i]
+            student_answer_clean = (answer if isinstance(answer, str) else str(answer)).strip().lower()
+            correct.append(similarity_at_least(keys[i].normalized, student_answer_clean, SHORT_ANSWER_CUTOFF))
+        return correct, [1.0 if c else 0.0 for c in correct]
+
+    @staticmethod
+    def _batch_single(questions: List[dict], keys: List[AnswerKey], answers: List[Any], indices: List[int]) -> Tuple[List[bool], List[float]]:
+        # Structured answers go through the single-answer grader
+        results = [AutoGrader.grade_question(questions[i], answers[i], keys[i]) for i in indices]
+        return [r.is_correct for r in results], [float(r.points_earned) for r in results]
+
     @staticmethod
     def _parse_boolean(answer: str) -> bool:
         answer_lower = answer.strip().lower()
-        true_values = ['true', 't', 'yes', 'y', '1', 'correct']
-        false_values = ['false', 'f', 'no', 'n', '0', 'incorrect']
         
-        if answer_lower in true_values:
+        if answer_lower in TRUE_VALUES:
             return True
-        elif answer_lower in false_values:
+        elif answer_lower in FALSE_VALUES:
             return False
         else:
             raise ValueError(f"Cannot parse boolean from: {answer}")
     
+    @staticmethod
+    def _matching_pairs(student_answer) -> List[Tuple[str, str]]:
+        """Student pairs as (left, right) strings; JSON round trips turn tuples into lists"""
+        if isinstance(student_answer, (list, tuple)):
+            pairs = []
+            for pair in student_answer:
+                if isinstance(pair, (list, tuple)) and len(pair) == 2:
+                    pairs.append((str(pair[0]), str(pair[1])))
+                else:
+                    raise ValueError(f"Invalid pair format: {pair}")
+            return pairs
+        return AutoGrader._parse_matching_answer(str(student_answer))
+    
     @staticmethod
     def _parse_matching_answer(answer: str) -> List[Tuple]:
         """Parse matching answer format: (item1,item2),(item3,item4)"""
-        # Remove whitespace and split by ),(
-        pairs = re.findall(r'\(([^)]+)\)', answer)
         result = []
-        for pair in pairs:
+        for pair in MATCHING_PAIR_PATTERN.findall(answer):
             items = [item.strip() for item in pair.split(',')]
             if len(items) == 2:
                 result.append((items[0], items[1]))
@@ -302,3 +484,14 @@ class AutoGrader:
     def _parse_ordering_answer(answer: str) -> List[str]:
         """Parse ordering answer format: item1,item2,item3"""
         return [item.strip() for item in answer.split(',')]
+
+# Per-type group graders used by AutoGrader.grade_batch
+BATCH_GRADERS = {
+    "mcq": AutoGrader._batch_exact,
+    "fib": AutoGrader._batch_exact,
+    "tf": AutoGrader._batch_tf,
+    "numeric": AutoGrader._batch_numeric,
+    "short_answer": AutoGrader._batch_short_answer,
+    "matching": AutoGrader._batch_single,
+    "ordering": AutoGrader._batch_single,
+}
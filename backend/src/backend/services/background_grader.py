@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional, Set
+from dotenv import load_dotenv
+from ..database.async_client import async_db_client
+from .grading import FR_GRADING_CONCURRENCY, grade_session_question
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """Spaces out acquisitions so at most `rate_per_minute` start per minute"""
+    def __init__(self, rate_per_minute: float):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+class BackgroundGrader:
+    """
+    Speculatively grades answers as they are saved, so submitting a session
+    mostly aggregates grades that already exist. Grades are stored with the
+    answer hash they were made for; grade_session_question reuses them only
+    while the answer is unchanged, so a stale speculative grade is never used.
+
+    Auto-graded types are graded right away. FR answers wait `fr_delay`
+    seconds for the student to stop editing (a newer save restarts the wait)
+    and then go to the agents service through a rate limiter and the same
+    concurrency cap as session grading. A session graded while an FR grade is
+    in flight shares that call through the grade cache instead of repeating it.
+    """
+    def __init__(
+        self,
+        enabled: bool = False,
+        fr_delay: float = 10.0,
+        fr_rate_per_minute: float = 30.0,
+        fr_concurrency: int = FR_GRADING_CONCURRENCY
+    ):
+        self.enabled = enabled
+        self.fr_delay = fr_delay
+        self.fr_concurrency = fr_concurrency
+        self._fr_limiter = RateLimiter(fr_rate_per_minute)
+        self._fr_semaphore: Optional[asyncio.Semaphore] = None
+        # Questions still waiting to be graded; a newer save replaces the task
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._stats = {"submitted": 0, "superseded": 0, "graded": 0, "reused": 0, "failed": 0}
+
+    async def start(self) -> None:
+        self._fr_semaphore = asyncio.Semaphore(self.fr_concurrency)
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pending.clear()
+        self._tasks.clear()
+
+    def submit(self, question_id: str) -> None:
+        """Grade the question's saved answer in the background"""
+        if not self.enabled or self._fr_semaphore is None:
+            return
+
+        self._stats["submitted"] += 1
+        previous = self._pending.pop(question_id, None)
+        if previous is not None:
+            previous.cancel()
+            self._stats["superseded"] += 1
+
+        task = asyncio.create_task(self._grade(question_id))
+        self._pending[question_id] = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _grade(self, question_id: str) -> None:
+        task = asyncio.current_task()
+        try:
+            question_data = await async_db_client.get_question(question_id)
+            if not question_data or not question_data.get("student_answer"):
+                return
+
+            if question_data["question"]["data"]["type"] == "fr":
+                await asyncio.sleep(self.fr_delay)
+                # Read again: the answer may have changed while waiting
+                question_data = await async_db_client.get_question(question_id)
+                if not question_data or not question_data.get("student_answer"):
+                    return
+                await self._fr_limiter.acquire()
+        finally:
+            # Past this point the grade runs to completion; a session grade may
+            # be sharing the same FR call and must not see it cancelled
+            if self._pending.get(question_id) is task:
+                del self._pending[question_id]
+
+        try:
+            graded = await grade_session_question(question_data, self._fr_semaphore)
+            if graded["reused"]:
+                self._stats["reused"] += 1
+                return
+            if graded["graded_answer_hash"] is None:
+                # Failed FR grade; grade_session will retry it
+                self._stats["failed"] += 1
+                return
+
+            # is_completed is left for grade_session to set on submission
+            await async_db_client.update_question_state(
+                question_id,
+                points_earned=graded["points_earned"],
+                is_correct=graded["is_correct"],
+                graded_answer_hash=graded["graded_answer_hash"],
+                grader_version=graded["grader_version"]
+            )
+            self._stats["graded"] += 1
+        except Exception:
+            self._stats["failed"] += 1
+            logger.exception("Background grading failed for question %s", question_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            **self._stats,
+            "pending": len(self._pending),
+            "running": len(self._tasks) - len(self._pending),
+        }
+
+background_grader = BackgroundGrader(
+    enabled=os.getenv("SPECULATIVE_GRADING", "false").lower() in ("1", "true", "yes"),
+    fr_delay=float(os.getenv("SPECULATIVE_FR_DELAY_SECONDS", "10")),
+    fr_rate_per_minute=float(os.getenv("SPECULATIVE_FR_RATE_PER_MINUTE", "30"))
+)
@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+from ..database.cache import LRUCache
+
+# Types whose graders compare answers case- and whitespace-insensitively, so
+# answers that differ only in that grade the same
+CASE_INSENSITIVE_TYPES = ("mcq", "fib", "short_answer", "tf")
+
+def normalize_answer(question_type: str, answer: Any) -> str:
+    if isinstance(answer, str):
+        answer = answer.strip()
+        if question_type in CASE_INSENSITIVE_TYPES:
+            answer = answer.lower()
+    # Tuples become lists, matching what the answer looks like after storage
+    return json.dumps(answer, sort_keys=True, separators=(",", ":"), default=str)
+
+def answer_hash(question_type: str, answer: Any, grader_version: str = "") -> str:
+    """Identifies a normalized answer as graded by a given grader version"""
+    material = f"{question_type}\x00{grader_version}\x00{normalize_answer(question_type, answer)}"
+    return hashlib.sha256(material.encode()).hexdigest()[:32]
+
+class GradeCache:
+    """
+    Grades by (question id, normalized answer hash): an in-memory LRU in front
+    of a small SQLite file at `path`, so grades survive restarts. The file is
+    opened by `open()` (the server calls it at startup) or on first use, and
+    keeps at most `max_entries` grades, dropping the least recently used
+    beyond that. A None path keeps grades in memory only.
+    """
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: Optional[str] = "./grade_cache.db", maxsize: int = 10000, max_entries: int = 200000):
+        self.path = path
+        self.max_entries = max_entries
+        self._memory = LRUCache(maxsize=maxsize, ttl=None)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._in_flight: Dict[tuple, asyncio.Task] = {}
+        # Bumped when a question is rewritten; part of the in-memory key, so
+        # grades of the old version can't match and age out of the LRU
+        self._versions: Dict[str, int] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def open(self) -> None:
+        with self._lock:
+            self._open()
+
+    def _open(self) -> Optional[sqlite3.Connection]:
+        # Callers hold self._lock
+        if self._conn is None and self.path:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS grades (
+                    question_id TEXT NOT NULL,
+                    answer_hash TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (question_id, answer_hash)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_grades_last_used ON grades (last_used)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _memory_key(self, question_id: str, digest: str) -> tuple:
+        return (question_id, self._versions.get(question_id, 0), digest)
+
+    def get(self, question_id: str, digest: str) -> Optional[Dict[str, Any]]:
+        memory_key = self._memory_key(question_id, digest)
+        result = self._memory.get(memory_key)
+        if result is not None or not self.path:
+            return result
+
+        with self._lock:
+            conn = self._open()
+            row = conn.execute(
+                "SELECT result FROM grades WHERE question_id = ? AND answer_hash = ?",
+                (question_id, digest)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE grades SET last_used = ? WHERE question_id = ? AND answer_hash = ?",
+                (time.time(), question_id, digest)
+            )
+            conn.commit()
+
+        result = json.loads(row[0])
+        self._memory.set(memory_key, result)
+        return result
+
+    def set(self, question_id: str, digest: str, result: Dict[str, Any]) -> None:
+        self._memory.set(self._memory_key(question_id, digest), result)
+        if not self.path:
+            return
+
+        with self._lock:
+            conn = self._open()
+            conn.execute(
+                "INSERT OR REPLACE INTO grades (question_id, answer_hash, result, last_used) VALUES (?, ?, ?, ?)",
+                (question_id, digest, json.dumps(result), time.time())
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                conn.execute(
+                    """
+                    DELETE FROM grades WHERE last_used <= (
+                        SELECT last_used FROM grades ORDER BY last_used DESC LIMIT 1 OFFSET ?
+                    )
+                    """,
+                    (self.max_entries,)
+                )
+            conn.commit()
+
+    def invalidate_question(self, question_id: str) -> None:
+        # Grades still in flight keep running for their callers but aren't stored
+        for key in [key for key in list(self._in_flight) if key[0] == question_id]:
+            self._in_flight.pop(key, None)
+        with self._lock:
+            self._versions[question_id] = self._versions.get(question_id, 0) + 1
+            if self.path:
+                conn = self._open()
+                conn.execute("DELETE FROM grades WHERE question_id = ?", (question_id,))
+                conn.commit()
+
+    def grade(
+        self,
+        question_id: str,
+        question_type: str,
+        answer: Any,
+        grade_fn: Callable[[], Dict[str, Any]],
+        grader_version: str = ""
+    ) -> Dict[str, Any]:
+        """Return the cached grade for this answer, or grade it with grade_fn and cache the result"""
+        digest = answer_hash(question_type, answer, grader_version)
+        result = self.get(question_id, digest)
+        if result is None:
+            result = grade_fn()
+            self.set(question_id, digest, result)
+        return result
+
+    async def agrade(
+        self,
+        question_id: str,
+        question_type: str,
+        answer: Any,
+        grade_fn: Callable[[], Awaitable[Dict[str, Any]]],
+        cacheable: Callable[[Dict[str, Any]], bool] = lambda result: True,
+        grader_version: str = ""
+    ) -> Dict[str, Any]:
+        """
+        Async variant for slow graders. Concurrent requests for the same
+        (question, answer) share one grade_fn call; results rejected by
+        `cacheable` (e.g. failed LLM calls) are returned but not stored.
+
+        The shared call runs in its own task, so a caller that is cancelled
+        (e.g. a disconnected stream) stops waiting without cancelling the
+        grade for the others; an abandoned grade still lands in the cache.
+        """
+        digest = answer_hash(question_type, answer, grader_version)
+        key = (question_id, digest)
+        if key not in self._in_flight:
+            result = await asyncio.to_thread(self.get, question_id, digest)
+            if result is not None:
+                return result
+
+        task = self._in_flight.get(key)
+        if task is None:
+            async def run() -> Dict[str, Any]:
+                result = await grade_fn()
+                if cacheable(result) and self._in_flight.get(key) is asyncio.current_task():
+                    await asyncio.to_thread(self.set, question_id, digest, result)
+                return result
+
+            task = asyncio.create_task(run())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: tuple, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            self._in_flight.pop(key, None)
+        # Every caller may have gone; don't warn about an unretrieved exception
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"memory": self._memory.stats(), "persistent": bool(self.path)}
+        if self.path:
+            with self._lock:
+                stats["entries"] = self._open().execute("SELECT COUNT(*) FROM grades").fetchone()[0]
+        return stats
+
+grade_cache = GradeCache(
+    path=os.getenv("GRADE_CACHE_PATH", "./grade_cache.db") or None,
+    maxsize=int(os.getenv("GRADE_CACHE_SIZE", "10000")),
+    max_entries=int(os.getenv("GRADE_CACHE_MAX_ENTRIES", "200000"))
+)
@@ -0,0 +1,206 @@
+import asyncio
+import os
+from dotenv import load_dotenv
+from .agents_client import agents_client
+from .auto_grader import GRADER_VERSION, AutoGrader
+from .answer_key import answer_keys
+from .grade_cache import answer_hash, grade_cache
+from ..models.question import AutoGradeResponse, GradeRequest
+
+load_dotenv()
+
+# Max free response answers graded by the agents service at once, and how
+# long a single one may take before it's scored as a failure
+FR_GRADING_CONCURRENCY = int(os.getenv("FR_GRADING_CONCURRENCY", "4"))
+FR_GRADING_TIMEOUT_SECONDS = float(os.getenv("FR_GRADING_TIMEOUT_SECONDS", "300"))
+# Bump to re-grade stored FR grades, e.g. after changing the grading prompt or model
+FR_GRADER_VERSION = os.getenv("FR_GRADER_VERSION", "1")
+
+async def grade_free_response_question(question_data: dict, student_answer) -> dict:
+    """
+    Grade a single free response question using the agent grader
+    Returns a dict with grading results
+    """
+    try:
+        # Create a GradeRequest for the agent grader
+        from ..models.question import AgentGeneratedQuestion
+        
+        # Reconstruct the question object
+        question_obj = AgentGeneratedQuestion(**question_data)
+        
+        request = GradeRequest(
+            question=question_obj,
+            student_answer=student_answer
+        )
+        
+        client = agents_client.client
+        response = await client.post(
+            "/agents/grade",
+            json=request.model_dump(),
+            headers={"Accept": "application/json"},
+            timeout=FR_GRADING_TIMEOUT_SECONDS
+        )
+            
+        if response.is_error:
+            return {
+                "success": False,
+                "error": f"Agents service returned {response.status_code}",
+                "points_earned": 0,
+                "explanation": "Failed to grade free response question"
+            }
+            
+        # The agents service answers Accept: application/json with the FRGrade
+        grade_info = response.json()
+        if "score" not in grade_info:
+            return {
+                "success": False,
+                "error": "Invalid response from agent grader",
+                "points_earned": 0,
+                "explanation": "Failed to parse grading response"
+            }
+        
+        # The score is out of the rubric's points; callers scale a 0-1 fraction
+        max_points = question_obj.data.points
+        score = grade_info["score"]
+        fraction = min(max(score / max_points, 0.0), 1.0) if max_points > 0 else 0.0
+        return {
+            "success": True,
+            "points_earned": fraction,
+            "explanation": grade_info.get("explanation", "Free response graded"),
+            "is_correct": score > 0
+        }
+                
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "points_earned": 0,
+            "explanation": f"Error grading free response: {str(e)}"
+        }
+
+def grader_version(question_type: str) -> str:
+    return f"fr-{FR_GRADER_VERSION}" if question_type == "fr" else f"auto-{GRADER_VERSION}"
+
+def auto_grade_cached(question_id: str, question_data: dict, student_answer) -> AutoGradeResponse:
+    """AutoGrader result for this answer, graded at most once per normalized answer"""
+    result = grade_cache.grade(
+        question_id,
+        question_data["type"],
+        student_answer,
+        lambda: AutoGrader.grade_question(
+            question_data,
+            student_answer,
+            answer_keys.get(question_id, question_data)
+        ).model_dump(),
+        grader_version=grader_version(question_data["type"])
+    )
+    return AutoGradeResponse(**result)
+
+async def grade_free_response_with_timeout(question_data: dict, student_answer, semaphore: asyncio.Semaphore) -> dict:
+    async with semaphore:
+        try:
+            return await asyncio.wait_for(
+                grade_free_response_question(question_data, student_answer),
+                timeout=FR_GRADING_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            return {
+                "success": False,
+                "error": "timeout",
+                "points_earned": 0,
+                "is_correct": False,
+                "explanation": f"Free response grading timed out after {FR_GRADING_TIMEOUT_SECONDS:.0f}s"
+            }
+
+async def grade_session_question(question_data: dict, fr_semaphore: asyncio.Semaphore) -> dict:
+    """
+    Grade one question of a session. Returns the per-question summary used to
+    build the TestResult
+    """
+    question_type = question_data["question"]["data"]["type"]
+    question_points = question_data.get("points", 1)
+    
+    # Check if student has answered
+    student_answer = question_data.get("student_answer")
+    if not student_answer:
+        # No answer provided, 0 points
+        return {
+            "question_id": question_data["id"],
+            "type": question_type,
+            "points": question_points,
+            "points_earned": 0,
+            "is_correct": False,
+            "explanation": "No answer provided",
+            "answered": False,
+            "reused": False
+        }
+    
+    version = grader_version(question_type)
+    digest = answer_hash(question_type, student_answer, version)
+    if (
+        question_data.get("graded_answer_hash") == digest
+        and question_data.get("grader_version") == version
+        and question_data.get("points_earned") is not None
+    ):
+        # Unchanged since its last grade: reuse the stored result
+        cached = await asyncio.to_thread(grade_cache.get, question_data["id"], digest)
+        return {
+            "question_id": question_data["id"],
+            "type": question_type,
+            "points": question_points,
+            "points_earned": question_data["points_earned"],
+            "is_correct": bool(question_data.get("is_correct")),
+            "explanation": cached["explanation"] if cached else "Answer unchanged since it was last graded",
+            "answered": True,
+            "reused": True,
+            # Graded in the background but not yet submitted
+            "is_completed": bool(question_data.get("is_completed"))
+        }
+    
+    # Grade based on question type
+    if question_type == "fr":
+        # Free response questions use agent grader
+        fr_result = await grade_cache.agrade(
+            question_data["id"],
+            question_type,
+            student_answer,
+            lambda: grade_free_response_with_timeout(
+                question_data["question"],
+                student_answer,
+                fr_semaphore
+            ),
+            # Failed or timed out grades are retried next time
+            cacheable=lambda result: result.get("success", False),
+            grader_version=version
+        )
+        if not fr_result.get("success", False):
+            digest = None
+        is_correct = fr_result.get("is_correct", False)
+        explanation = fr_result["explanation"]
+        score = fr_result["points_earned"]
+    else:
+        # Auto-grade other question types
+        grade_result = await asyncio.to_thread(
+            auto_grade_cached,
+            question_data["id"],
+            question_data["question"]["data"], 
+            student_answer
+        )
+        is_correct = grade_result.is_correct
+        explanation = grade_result.explanation
+        score = grade_result.points_earned
+    
+    return {
+        "question_id": question_data["id"],
+        "type": question_type,
+        "points": question_points,
+        # Calculate points earned for this question
+        "points_earned": round(score * question_points, 2),
+        "is_correct": is_correct,
+        "explanation": explanation,
+        "answered": True,
+        "reused": False,
+        # Left unset for failed grades so the next re-grade retries them
+        "graded_answer_hash": digest,
+        "grader_version": version
+    }
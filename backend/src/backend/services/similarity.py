@@ -0,0 +1,67 @@
+from collections import Counter
+import difflib
+import math
+
+def _required_matches(total: int, cutoff: float) -> int:
+    """Smallest matched-character count M with 2.0 * M / total >= cutoff"""
+    needed = max(0, math.ceil(cutoff * total / 2) - 1)
+    # Walk past float rounding so the decision agrees with ratio() exactly
+    while 2.0 * needed / total < cutoff:
+        needed += 1
+    return needed
+
+def similarity_at_least(a: str, b: str, cutoff: float = 0.7) -> bool:
+    """
+    Whether difflib.SequenceMatcher(None, a, b).ratio() >= cutoff, decided
+    with as little work as possible:
+
+    - length prefilter: at most min(len) characters can match, O(1)
+    - character-count bound: at most the multiset overlap of the two
+      strings can match, O(n)
+    - bounded matching: the same longest-match recursion as
+      get_matching_blocks, stopping as soon as the matched total reaches the
+      cutoff or the matched total plus the best case of every pending range
+      can no longer reach it
+
+    The matching blocks, junk heuristics included, are SequenceMatcher's own,
+    so the decision is identical to comparing ratio() against the cutoff.
+    """
+    total = len(a) + len(b)
+    if total == 0:
+        # ratio() is 1.0 for two empty strings
+        return 1.0 >= cutoff
+
+    needed = _required_matches(total, cutoff)
+    if min(len(a), len(b)) < needed:
+        return False
+    if _count_overlap(a, b) < needed:
+        return False
+
+    matcher = difflib.SequenceMatcher(None, a, b)
+    matched = 0
+    pending = [(0, len(a), 0, len(b))]
+    # Best case for everything not yet matched
+    remaining = min(len(a), len(b))
+    while pending:
+        alo, ahi, blo, bhi = pending.pop()
+        remaining -= min(ahi - alo, bhi - blo)
+        i, j, k = matcher.find_longest_match(alo, ahi, blo, bhi)
+        if k:
+            matched += k
+            if alo < i and blo < j:
+                pending.append((alo, i, blo, j))
+                remaining += min(i - alo, j - blo)
+            if i + k < ahi and j + k < bhi:
+                pending.append((i + k, ahi, j + k, bhi))
+                remaining += min(ahi - i - k, bhi - j - k)
+
+        if matched >= needed:
+            return True
+        if matched + remaining < needed:
+            return False
+
+    return matched >= needed
+
+def _count_overlap(a: str, b: str) -> int:
+    """Characters the two strings share, counting repeats (quick_ratio's bound)"""
+    return sum((Counter(a) & Counter(b)).values())
@@ -0,0 +1,59 @@
+import argparse
+import difflib
+import random
+import string
+import time
+from typing import Optional
+from .similarity import similarity_at_least
+
+def run(pairs: int = 2000, seed: Optional[int] = 0) -> None:
+    """Check the decisions against SequenceMatcher and compare timings"""
+    rng = random.Random(seed)
+    alphabet = string.ascii_lowercase + "      "
+
+    def text(length: int) -> str:
+        return "".join(rng.choice(alphabet) for _ in range(length))
+
+    def mutate(value: str, rate: float) -> str:
+        return "".join(
+            rng.choice(alphabet) if rng.random() < rate else char
+            for char in value
+            if rng.random() >= rate / 2
+        )
+
+    cases = []
+    for _ in range(pairs):
+        key = text(rng.choice([10, 40, 120]))
+        kind = rng.random()
+        if kind < 0.4:
+            # Near misses and near hits around the cutoff
+            answer = mutate(key, rng.choice([0.05, 0.2, 0.3, 0.4]))
+        elif kind < 0.7:
+            # Long pasted answers that contain the key somewhere
+            answer = text(rng.randrange(200, 2000)) + key + text(rng.randrange(0, 500))
+        else:
+            answer = text(rng.randrange(1, 300))
+        cases.append((key, answer))
+
+    started_at = time.perf_counter()
+    expected = [difflib.SequenceMatcher(None, a, b).ratio() >= 0.7 for a, b in cases]
+    baseline = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    actual = [similarity_at_least(a, b, 0.7) for a, b in cases]
+    bounded = time.perf_counter() - started_at
+
+    mismatches = sum(1 for e, r in zip(expected, actual) if e != r)
+    print(f"{len(cases)} pairs, {sum(expected)} pass, {mismatches} mismatches")
+    print(f"SequenceMatcher.ratio(): {baseline * 1000:.1f} ms")
+    print(f"similarity_at_least():   {bounded * 1000:.1f} ms ({baseline / bounded:.1f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare similarity_at_least with SequenceMatcher.ratio()")
+    parser.add_argument("--pairs", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.pairs, args.seed)
+
+if __name__ == "__main__":
+    main()
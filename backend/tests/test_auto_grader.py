@@ -0,0 +1,34 @@
+from backend.services.auto_grader import AutoGrader
+
+
+def numeric(answer):
+    return {"type": "numeric", "answer": answer}
+
+
+def test_grade_batch_numeric_matches_grade_question():
+    questions = [numeric(3.14), numeric(100), numeric(-2.5), numeric(0)]
+    answers = ["3.14", 100.5, " -2.5 ", "abc"]
+    result = AutoGrader.grade_batch(questions, answers)
+
+    assert result.is_correct == [AutoGrader.grade_question(q, a).is_correct for q, a in zip(questions, answers)]
+    assert result.is_correct == [True, True, True, False]
+    assert result.points_earned == [1.0, 1.0, 1.0, 0.0]
+
+
+def test_grade_batch_numeric_list_answers_are_wrong():
+    # Equal-length lists would make NumPy build a 2-D array that broadcasts
+    # against the keys
+    questions = [numeric(3), numeric(4)]
+    result = AutoGrader.grade_batch(questions, [["3"], ["4"]])
+    assert result.is_correct == [False, False]
+    assert result.points_earned == [0.0, 0.0]
+
+
+def test_grade_batch_numeric_mixed_scalar_and_list_answers():
+    questions = [numeric(3), numeric(4), numeric(5), numeric(6)]
+    answers = ["3", ["4"], 5, ["6", "6"]]
+    result = AutoGrader.grade_batch(questions, answers)
+
+    assert result.is_correct == [True, False, True, False]
+    assert result.points_earned == [1.0, 0.0, 1.0, 0.0]
+    assert result.is_correct == [AutoGrader.grade_question(q, a).is_correct for q, a in zip(questions, answers)]
@@ -4,6 +4,8 @@ export interface TestResult {
   points_earned: number;
   summary: string;
   improvements: string[];
+  regraded?: number;
+  reused?: number;
 }
 
 export interface AutoGradeResponse {
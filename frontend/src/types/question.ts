@@ -66,6 +66,9 @@ export interface Question {
   is_completed: boolean;
   points: number;
   points_earned?: number;
+  is_correct?: boolean;
+  graded_answer_hash?: string;
+  grader_version?: string;
 }
 
 export interface QuestionWithOptionalCompletion extends Omit<Question, 'is_completed'> {